@@ -0,0 +1,3207 @@
+from __future__ import annotations
+
+import enum
+import os
+import yaml
+import argparse
+import sys
+import threading
+import hashlib
+import shutil
+import tempfile
+import json
+import re
+import resource
+import shlex
+import signal
+import subprocess
+import time
+import difflib
+import statistics
+import math
+import random
+import sqlite3
+import pickle
+import collections.abc
+import contextlib
+import io
+import glob
+import select
+import struct
+import mmap
+from typing import BinaryIO, Callable
+
+CONSOLE_LOCK = threading.RLock()
+
+class TextColor(enum.Enum):
+  RED="\x1b[1;31m"#]
+  GREEN="\x1b[1;32m"#]
+  PURPLE="\x1b[1;35m"#]
+  AZURE="\x1b[1;36m"#]
+  NORMAL="\x1b[0;39m"#]
+
+  def begin(self):
+    print(self.value, end='')
+
+  def end(self):
+    print(TextColor.NORMAL.value, end='')
+
+YAML_LOADER = getattr(yaml, 'CLoader', yaml.Loader)
+YAML_DUMPER = getattr(yaml, 'CDumper', yaml.Dumper)
+
+MEMPROFILE_SHIM = r"""
+#define _GNU_SOURCE
+#include <errno.h>
+#include <fcntl.h>
+#include <malloc.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+
+extern void *__libc_malloc(size_t size);
+extern void *__libc_calloc(size_t count, size_t size);
+extern void *__libc_realloc(void *pointer, size_t size);
+extern void *__libc_memalign(size_t alignment, size_t size);
+extern void *__libc_valloc(size_t size);
+extern void *__libc_pvalloc(size_t size);
+extern void __libc_free(void *pointer);
+
+static unsigned long allocations, frees, reallocs, requested, live_blocks, live_bytes, peak_bytes;
+
+static void exhausted(size_t size) {
+  const char *marker = getenv("LART_OOM_FD");
+  if (marker != NULL && size > 0)
+    write(atoi(marker), "oom\n", 4);
+}
+
+static void account(void *pointer, size_t size) {
+  if (pointer == NULL) {
+    exhausted(size);
+    return;
+  }
+  unsigned long usable = malloc_usable_size(pointer);
+  __atomic_add_fetch(&allocations, 1, __ATOMIC_RELAXED);
+  __atomic_add_fetch(&requested, size, __ATOMIC_RELAXED);
+  __atomic_add_fetch(&live_blocks, 1, __ATOMIC_RELAXED);
+  unsigned long live = __atomic_add_fetch(&live_bytes, usable, __ATOMIC_RELAXED);
+  unsigned long peak = __atomic_load_n(&peak_bytes, __ATOMIC_RELAXED);
+  while (live > peak && !__atomic_compare_exchange_n(&peak_bytes, &peak, live, 1, __ATOMIC_RELAXED, __ATOMIC_RELAXED));
+}
+
+static void release(void *pointer) {
+  if (pointer == NULL)
+    return;
+  __atomic_add_fetch(&frees, 1, __ATOMIC_RELAXED);
+  __atomic_sub_fetch(&live_blocks, 1, __ATOMIC_RELAXED);
+  __atomic_sub_fetch(&live_bytes, malloc_usable_size(pointer), __ATOMIC_RELAXED);
+}
+
+void *malloc(size_t size) {
+  void *pointer = __libc_malloc(size);
+  account(pointer, size);
+  return pointer;
+}
+
+void *calloc(size_t count, size_t size) {
+  void *pointer = __libc_calloc(count, size);
+  account(pointer, count * size);
+  return pointer;
+}
+
+void *realloc(void *pointer, size_t size) {
+  if (pointer == NULL)
+    return malloc(size);
+  if (size == 0) {
+    free(pointer);
+    return NULL;
+  }
+  unsigned long usable = malloc_usable_size(pointer);
+  void *moved = __libc_realloc(pointer, size);
+  if (moved == NULL) {
+    exhausted(size);
+    return NULL;
+  }
+  __atomic_add_fetch(&reallocs, 1, __ATOMIC_RELAXED);
+  __atomic_sub_fetch(&live_bytes, usable, __ATOMIC_RELAXED);
+  __atomic_sub_fetch(&live_blocks, 1, __ATOMIC_RELAXED);
+  __atomic_sub_fetch(&allocations, 1, __ATOMIC_RELAXED);
+  account(moved, size);
+  return moved;
+}
+
+void *memalign(size_t alignment, size_t size) {
+  void *pointer = __libc_memalign(alignment, size);
+  account(pointer, size);
+  return pointer;
+}
+
+void *aligned_alloc(size_t alignment, size_t size) {
+  return memalign(alignment, size);
+}
+
+int posix_memalign(void **pointer, size_t alignment, size_t size) {
+  if (alignment % sizeof(void *) != 0 || (alignment & (alignment - 1)) != 0)
+    return EINVAL;
+  void *aligned = memalign(alignment, size);
+  if (aligned == NULL && size > 0)
+    return ENOMEM;
+  *pointer = aligned;
+  return 0;
+}
+
+void *valloc(size_t size) {
+  void *pointer = __libc_valloc(size);
+  account(pointer, size);
+  return pointer;
+}
+
+void *pvalloc(size_t size) {
+  void *pointer = __libc_pvalloc(size);
+  account(pointer, size);
+  return pointer;
+}
+
+void free(void *pointer) {
+  release(pointer);
+  __libc_free(pointer);
+}
+
+__attribute__((destructor)) static void report(void) {
+  const char *path = getenv("LART_MEMPROFILE_OUTPUT");
+  if (path == NULL)
+    return;
+  char buffer[512];
+  int length = snprintf(buffer, sizeof(buffer),
+    "{\"allocations\": %lu, \"frees\": %lu, \"reallocs\": %lu, \"bytes\": %lu, \"peak\": %lu, \"leaked_blocks\": %lu, \"leaked_bytes\": %lu}\n",
+    allocations, frees, reallocs, requested, peak_bytes, live_blocks, live_bytes);
+  int fd = open(path, O_WRONLY | O_CREAT | O_TRUNC, 0644);
+  if (fd >= 0) {
+    write(fd, buffer, length);
+    close(fd);
+  }
+}
+"""
+
+OOM_SHIM = r"""
+#define _GNU_SOURCE
+#include <errno.h>
+#include <stdlib.h>
+#include <unistd.h>
+
+extern void *__libc_malloc(size_t size);
+extern void *__libc_calloc(size_t count, size_t size);
+extern void *__libc_realloc(void *pointer, size_t size);
+extern void *__libc_memalign(size_t alignment, size_t size);
+
+static void *checked(void *pointer, size_t size) {
+  const char *marker = getenv("LART_OOM_FD");
+  if (pointer == NULL && size > 0 && marker != NULL)
+    write(atoi(marker), "oom\n", 4);
+  return pointer;
+}
+
+void *malloc(size_t size) {
+  return checked(__libc_malloc(size), size);
+}
+
+void *calloc(size_t count, size_t size) {
+  return checked(__libc_calloc(count, size), count * size);
+}
+
+void *realloc(void *pointer, size_t size) {
+  return checked(__libc_realloc(pointer, size), size);
+}
+
+void *memalign(size_t alignment, size_t size) {
+  return checked(__libc_memalign(alignment, size), size);
+}
+
+void *aligned_alloc(size_t alignment, size_t size) {
+  return checked(__libc_memalign(alignment, size), size);
+}
+
+int posix_memalign(void **pointer, size_t alignment, size_t size) {
+  if (alignment % sizeof(void *) != 0 || (alignment & (alignment - 1)) != 0)
+    return EINVAL;
+  void *aligned = checked(__libc_memalign(alignment, size), size);
+  if (aligned == NULL && size > 0)
+    return ENOMEM;
+  *pointer = aligned;
+  return 0;
+}
+"""
+
+LAUNCHER = r"""
+#define _GNU_SOURCE
+#include <errno.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/prctl.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+int main(int argc, char **argv) {
+  int program = 5;
+  while (program < argc && strcmp(argv[program], "--") != 0)
+    program++;
+  if (program + 1 >= argc) {
+    fprintf(stderr, "usage: %s REPORT-FD CPU MEMORY OOM-SHIM [NAME=VALUE...] -- PROGRAM [ARGUMENTS...]\n", argv[0]);
+    return 127;
+  }
+  int report = atoi(argv[1]);
+  pid_t parent = getpid();
+  pid_t child = fork();
+  if (child < 0) {
+    perror("fork");
+    return 127;
+  }
+  if (child == 0) {
+    prctl(PR_SET_PDEATHSIG, SIGKILL);
+    if (getppid() != parent)
+      _exit(127);
+    for (int assignment = 5; assignment < program; assignment++)
+      putenv(argv[assignment]);
+    if (strcmp(argv[2], "-") != 0) {
+      rlim_t cpu = strtoull(argv[2], NULL, 10);
+      struct rlimit limit = {cpu, cpu + 1};
+      setrlimit(RLIMIT_CPU, &limit);
+    }
+    if (strcmp(argv[3], "-") != 0 && strcmp(argv[4], "-") != 0) {
+      char marker[32];
+      snprintf(marker, sizeof(marker), "%d", report);
+      setenv("LART_OOM_FD", marker, 1);
+      const char *preload = getenv("LD_PRELOAD");
+      if (preload != NULL && *preload != '\0') {
+        char *preloads = malloc(strlen(preload) + strlen(argv[4]) + 2);
+        sprintf(preloads, "%s:%s", preload, argv[4]);
+        setenv("LD_PRELOAD", preloads, 1);
+      } else {
+        setenv("LD_PRELOAD", argv[4], 1);
+      }
+    } else {
+      close(report);
+    }
+    if (strcmp(argv[3], "-") != 0) {
+      rlim_t memory = strtoull(argv[3], NULL, 10);
+      struct rlimit limit = {memory, memory};
+      setrlimit(RLIMIT_AS, &limit);
+    }
+    execvp(argv[program + 1], argv + program + 1);
+    fprintf(stderr, "%s: %s\n", argv[program + 1], strerror(errno));
+    _exit(127);
+  }
+  int status;
+  struct rusage usage;
+  while (wait4(child, &status, 0, &usage) < 0) {
+    if (errno != EINTR) {
+      perror("wait4");
+      return 127;
+    }
+  }
+  dprintf(report, "maxrss %ld\n", usage.ru_maxrss);
+  close(report);
+  if (WIFSIGNALED(status)) {
+    struct rlimit core = {0, 0};
+    setrlimit(RLIMIT_CORE, &core);
+    signal(WTERMSIG(status), SIG_DFL);
+    sigset_t signals;
+    sigemptyset(&signals);
+    sigaddset(&signals, WTERMSIG(status));
+    sigprocmask(SIG_UNBLOCK, &signals, NULL);
+    raise(WTERMSIG(status));
+  }
+  return WIFEXITED(status) ? WEXITSTATUS(status) : 127;
+}
+"""
+
+def read_yaml(path: str) -> dict:
+  with open(path, 'r') as file:
+    return yaml.load(file.read(), Loader=YAML_LOADER)
+
+def write_yaml(path: str, obj: dict) -> None:
+  with open(path, 'w') as file:
+    return yaml.dump(obj, file, Dumper=YAML_DUMPER)
+
+def hash_file(path: str) -> str:
+  digest = hashlib.sha256()
+  with open(path, 'rb') as file:
+    for chunk in iter(lambda: file.read(1 << 16), b''):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+def hash_tree(path: str) -> str:
+  digest = hashlib.sha256()
+  if os.path.isdir(path):
+    for root, dirs, files in os.walk(path):
+      dirs.sort()
+      for file in sorted(files):
+        file_path = os.path.join(root, file)
+        digest.update(os.path.relpath(file_path, path).encode())
+        digest.update(hash_file(file_path).encode())
+  return digest.hexdigest()
+
+def copy_atomic(source: str, destination: str) -> None:
+  staging = '%s.%d.%d' % (destination, os.getpid(), threading.get_ident())
+  try:
+    shutil.copyfile(source, staging)
+    os.replace(staging, destination)
+  finally:
+    if os.path.exists(staging):
+      os.remove(staging)
+
+def compare_files(left: str, right: str, chunk: int = 1 << 16) -> tuple[int, int]|None:
+  offset = 0
+  line = 1
+  with open(left, 'rb') as left_file, open(right, 'rb') as right_file:
+    while True:
+      left_chunk = left_file.read(chunk)
+      right_chunk = right_file.read(chunk)
+      if left_chunk != right_chunk:
+        index = 0
+        while index < len(left_chunk) and index < len(right_chunk) and left_chunk[index] == right_chunk[index]:
+          index += 1
+        return (offset + index, line + left_chunk.count(b'\n', 0, index))
+      if len(left_chunk) == 0:
+        return None
+      offset += len(left_chunk)
+      line += left_chunk.count(b'\n')
+
+def excerpt_lines(file: BinaryIO, first: int, count: int, width: int) -> list[str]:
+  lines: list[str] = []
+  for index in range(first + count):
+    line = file.readline(width)
+    if len(line) == 0:
+      break
+    if len(line) == width and not line.endswith(b'\n'):
+      while True:
+        rest = file.readline(1 << 16)
+        if len(rest) == 0 or rest.endswith(b'\n'):
+          break
+      line += b'...\n'
+    if index >= first:
+      lines.append(line.decode(errors='replace'))
+  return lines
+
+def diff_excerpt(left: str, right: str, line: int, context: int = 3, limit: int = 40, width: int = 512, budget: int = 8192) -> str:
+  first = max(line - 1 - context, 0)
+  with open(left, 'rb') as left_file, open(right, 'rb') as right_file:
+    left_lines = excerpt_lines(left_file, first, context + limit, width)
+    right_lines = excerpt_lines(right_file, first, context + limit, width)
+  excerpt = difflib.unified_diff(left_lines, right_lines, left, right, n=context)
+  hunk = re.compile(r'^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@')
+  excerpt = ''.join([hunk.sub(lambda m: '@@ -%d%s +%d%s @@' % (int(m[1]) + first, m[2] or '', int(m[3]) + first, m[4] or ''), _) for _ in excerpt])
+  if len(excerpt) > budget:
+    excerpt = excerpt[:budget] + '\n... (%d more characters)\n' % (len(excerpt) - budget,)
+  return excerpt
+
+def tail_excerpt(path: str, lines: int = 20, limit: int = 4096) -> str:
+  if not os.path.isfile(path):
+    return ''
+  with open(path, 'rb') as file:
+    file.seek(max(os.path.getsize(path) - limit, 0))
+    content = file.read().decode(errors='replace')
+  return '\n'.join(content.splitlines()[-lines:])
+
+class StreamComparator:
+  def __init__(self, reference: str, output: str) -> None:
+    self.reference = open(reference, 'rb')
+    self.output = open(output, 'wb')
+    self.size: int = os.path.getsize(reference)
+    self.offset: int = 0
+    self.line: int = 1
+    self.mismatch: tuple[int, int]|None = None
+    self.stopped: bool = False
+
+  def feed(self, chunk: bytes) -> bool:
+    expected = self.reference.read(len(chunk))
+    if expected != chunk:
+      index = 0
+      while index < len(expected) and expected[index] == chunk[index]:
+        index += 1
+      self.mismatch = (self.offset + index, self.line + chunk.count(b'\n', 0, index))
+      self.output.write(chunk)
+      self.stopped = True
+      return False
+    self.output.write(chunk)
+    self.offset += len(chunk)
+    self.line += chunk.count(b'\n')
+    return True
+
+  def finish(self) -> tuple[int, int]|None:
+    if self.mismatch is None and self.offset < self.size:
+      self.mismatch = (self.offset, self.line)
+    self.reference.close()
+    self.output.close()
+    return self.mismatch
+
+def create_output(path: str):
+  if os.path.lexists(path):
+    os.remove(path)
+  return open(path, 'wb')
+
+def link_or_copy(source: str, destination: str) -> None:
+  try:
+    os.link(source, destination)
+  except OSError:
+    shutil.copyfile(source, destination)
+    shutil.copymode(source, destination)
+
+class ElfFile:
+  SECTIONS = ['.text', '.data', '.bss', '.rodata']
+  SHT_SYMTAB = 2
+  SHT_NOBITS = 8
+  STT_FUNC = 2
+
+  def __init__(self, path: str) -> None:
+    self.path: str = path
+    self.sections: dict[str, int] = {}
+    self.functions: dict[str, int] = {}
+    if os.path.getsize(path) < 16:
+      raise ValueError('Cannot read `%s`: it is not an ELF file' % (path,))
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+      if data[:4] != b'\x7fELF' or data[4] not in [1, 2] or data[5] not in [1, 2]:
+        raise ValueError('Cannot read `%s`: it is not an ELF file' % (path,))
+      self.parse(data, data[4] == 2, '<' if data[5] == 1 else '>')
+
+  def parse(self, data: mmap.mmap, wide: bool, order: str) -> None:
+    header = struct.Struct(order + ('16sHHIQQQIHHHHHH' if wide else '16sHHIIIIIHHHHHH'))
+    section = struct.Struct(order + ('IIQQQQIIQQ' if wide else 'IIIIIIIIII'))
+    symbol = struct.Struct(order + ('IBBHQQ' if wide else 'IIIBBH'))
+    _, _, _, _, _, _, shoff, _, _, _, _, _, shnum, shstrndx = header.unpack_from(data, 0)
+    if shoff == 0:
+      return
+    first = section.unpack_from(data, shoff)
+    shnum = shnum or first[5]
+    shstrndx = first[6] if shstrndx == 0xffff else shstrndx
+    headers = [section.unpack_from(data, shoff + index * section.size) for index in range(shnum)]
+    strings = headers[shstrndx]
+    name = lambda table, offset: data[table[4] + offset:data.find(b'\0', table[4] + offset)].decode(errors='replace')
+
+    for (name_offset, kind, _, _, offset, size, link, _, _, entsize) in headers:
+      section_name = name(strings, name_offset)
+      for prefix in ElfFile.SECTIONS:
+        if section_name == prefix or section_name.startswith(prefix + '.'):
+          self.sections[prefix] = self.sections.get(prefix, 0) + size
+      if kind == ElfFile.SHT_SYMTAB and entsize > 0:
+        for index in range(size // entsize):
+          entry = symbol.unpack_from(data, offset + index * entsize)
+          if wide:
+            symbol_name, info, _, _, _, symbol_size = entry
+          else:
+            symbol_name, _, symbol_size, info, _, _ = entry
+          if info & 0xf == ElfFile.STT_FUNC and symbol_size > 0:
+            self.functions[name(headers[link], symbol_name)] = symbol_size
+    for prefix in ElfFile.SECTIONS:
+      self.sections.setdefault(prefix, 0)
+
+class IrMetrics:
+  DEFINE = re.compile(r'^define\b.*?@("[^"]+"|[\w.$-]+)\s*\(')
+  LABEL = re.compile(r'^("[^"]+"|[\w.$-]+):')
+  TYPEDEF = re.compile(r'^(%[\w.$-]+|%"[^"]+")\s*=\s*type\s+(.*)$')
+  TOKEN = re.compile(r'<\{|\}>|[{}\[\]<>,*]|%"[^"]+"|%?[\w.$-]+')
+  QUOTED = re.compile(r'"[^"]*"')
+  SCALARS = {'ptr': 8, 'half': 2, 'bfloat': 2, 'float': 4, 'double': 8, 'fp128': 16, 'x86_fp80': 16, 'ppc_fp128': 16, 'void': 0}
+
+  def __init__(self) -> None:
+    self.types: dict[str, tuple[int, int]] = {}
+    self.functions: dict[str, dict[str, int]] = {}
+    self.current: dict[str, int]|None = None
+    self.depth: int = 0
+
+  @staticmethod
+  def parse(path: str) -> IrMetrics:
+    metrics = IrMetrics()
+    with open(path, 'r', errors='replace') as file:
+      for line in file:
+        metrics.feed(line)
+    return metrics
+
+  def type_size(self, tokens: list[str], index: int) -> tuple[int, int, int]:
+    token = tokens[index]
+    if token in ['{', '<{']:
+      packed = (token == '<{')
+      size, align, index = 0, 1, index + 1
+      while index < len(tokens) and tokens[index] not in ['}', '}>']:
+        if tokens[index] == ',':
+          index += 1
+          continue
+        element_size, element_align, index = self.type_size(tokens, index)
+        if not packed:
+          size = (size + element_align - 1) // element_align * element_align
+          align = max(align, element_align)
+        size += element_size
+      size = (size + align - 1) // align * align
+      index += 1
+    elif token == '[' or token == '<':
+      count = int(tokens[index + 1]) if tokens[index + 1].isdigit() else 0
+      element_size, align, index = self.type_size(tokens, index + 3)
+      size, index = count * element_size, index + 1
+    elif re.fullmatch(r'i\d+', token):
+      size = (int(token[1:]) + 7) // 8
+      align, index = min(max(1 << max(size - 1, 0).bit_length(), 1), 16), index + 1
+    elif token.startswith('%'):
+      size, align = self.types.get(token, (0, 1))
+      index += 1
+    else:
+      size = IrMetrics.SCALARS.get(token, 0)
+      align, index = max(size, 1), index + 1
+    while index < len(tokens) and tokens[index] == '*':
+      size, align, index = 8, 8, index + 1
+    return (size, align, index)
+
+  def feed(self, line: str) -> None:
+    line = line.split(';', 1)[0].rstrip() if ';' in line and '"' not in line else line.rstrip()
+    if self.current is None:
+      definition = IrMetrics.TYPEDEF.match(line)
+      if definition is not None:
+        tokens = IrMetrics.TOKEN.findall(definition[2])
+        if len(tokens) > 0 and tokens[0] != 'opaque':
+          size, align, _ = self.type_size(tokens, 0)
+          self.types[definition[1]] = (size, align)
+        return
+      function = IrMetrics.DEFINE.match(line)
+      if function is not None:
+        self.current = {'instructions': 0, 'blocks': 1, 'allocas': 0, 'loads': 0, 'stores': 0, 'calls': 0, 'frame': 0}
+        self.functions[function[1].strip('"')] = self.current
+      return
+    stripped = line.strip()
+    if stripped == '}':
+      self.current = None
+      return
+    if len(stripped) == 0:
+      return
+    unquoted = IrMetrics.QUOTED.sub('', stripped)
+    if self.depth > 0 or stripped.startswith(']'):
+      self.depth = max(self.depth + unquoted.count('[') - unquoted.count(']'), 0)
+      return
+    if IrMetrics.LABEL.match(stripped):
+      if self.current['instructions'] > 0:
+        self.current['blocks'] += 1
+      return
+    self.current['instructions'] += 1
+    self.depth = max(unquoted.count('[') - unquoted.count(']'), 0)
+    instruction = stripped.split('=', 1)[1].strip() if stripped.startswith('%') and '=' in stripped else stripped
+    opcode = instruction.split(' ', 1)[0]
+    if opcode == 'alloca':
+      tokens = IrMetrics.TOKEN.findall(instruction)
+      size, align, _ = self.type_size(tokens, 1)
+      explicit = re.search(r'\balign (\d+)', instruction)
+      align = int(explicit[1]) if explicit is not None else align
+      self.current['allocas'] += 1
+      self.current['frame'] = (self.current['frame'] + align - 1) // align * align + size
+    elif opcode == 'load':
+      self.current['loads'] += 1
+    elif opcode == 'store':
+      self.current['stores'] += 1
+    elif opcode in ['call', 'invoke', 'tail', 'musttail', 'notail']:
+      self.current['calls'] += 1
+
+class BuildCache:
+  def __init__(self, path: str, capacity: int) -> None:
+    self.path: str = path
+    self.capacity: int = capacity
+    self.stored: bool = False
+
+  def to_dict(self) -> dict:
+    return {
+      'path': self.path,
+      'capacity': self.capacity,
+    }
+
+  @staticmethod
+  def from_dict(data: dict) -> BuildCache:
+    return BuildCache(
+      path = data['path'],
+      capacity = data['capacity'],
+    )
+
+  @staticmethod
+  def key(*parts: str) -> str:
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+  def entry(self, key: str) -> str:
+    return os.path.join(self.path, key[:2], key)
+
+  def restore(self, key: str, outputs: list[str]) -> bool:
+    entry = self.entry(key)
+    if not os.path.isdir(entry):
+      return False
+    for index, output in enumerate(outputs):
+      cached = os.path.join(entry, str(index))
+      if not os.path.exists(cached):
+        if os.path.exists(output):
+          os.remove(output)
+        continue
+      if os.path.exists(output) and os.path.samefile(cached, output):
+        continue
+      staging = '%s.%d.%d' % (output, os.getpid(), threading.get_ident())
+      link_or_copy(cached, staging)
+      os.replace(staging, output)
+    os.utime(entry)
+    return True
+
+  def store(self, key: str, outputs: list[str]) -> None:
+    entry = self.entry(key)
+    if os.path.isdir(entry):
+      return
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(entry))
+    for index, output in enumerate(outputs):
+      if os.path.exists(output):
+        link_or_copy(output, os.path.join(staging, str(index)))
+    try:
+      os.rename(staging, entry)
+      self.stored = True
+    except OSError:
+      shutil.rmtree(staging, ignore_errors=True)
+
+  def evict(self) -> None:
+    if not self.stored or not os.path.isdir(self.path):
+      return
+    entries: list[tuple[float, int, str]] = []
+    total = 0
+    for bucket in os.scandir(self.path):
+      if not bucket.is_dir():
+        continue
+      for entry in os.scandir(bucket.path):
+        size = sum(file.stat().st_size for file in os.scandir(entry.path))
+        entries.append((entry.stat().st_mtime, size, entry.path))
+        total += size
+    entries.sort()
+    for _, size, path in entries:
+      if total <= self.capacity:
+        break
+      shutil.rmtree(path, ignore_errors=True)
+      total -= size
+
+class IncludeGraph:
+  DIRECTIVE = re.compile(r'^\s*include\s*[<"]([^>"]+)[>"]\s*;?', re.MULTILINE)
+  COMMENT = re.compile(r'/\*.*?\*/|//[^\n]*', re.DOTALL)
+
+  def __init__(self, path: str, include_directories: list[str], files: dict[str, dict]) -> None:
+    self.path: str = path
+    self.include_directories: list[str] = include_directories
+    self.files: dict[str, dict] = files
+    self.dirty: bool = False
+    self.lock = threading.Lock()
+
+  def to_dict(self) -> dict:
+    return {
+      'directive': IncludeGraph.DIRECTIVE.pattern,
+      'include_directories': self.include_directories,
+      'files': self.files,
+    }
+
+  @staticmethod
+  def load(path: str, include_directories: list[str]) -> IncludeGraph:
+    if os.path.exists(path):
+      data = read_yaml(path) or {}
+      if data.get('include_directories') == include_directories and data.get('directive') == IncludeGraph.DIRECTIVE.pattern:
+        return IncludeGraph(path, include_directories, data.get('files') or {})
+    graph = IncludeGraph(path, include_directories, {})
+    graph.dirty = True
+    return graph
+
+  def save(self) -> None:
+    with self.lock:
+      if self.dirty:
+        write_yaml(self.path, self.to_dict())
+        self.dirty = False
+
+  def resolve(self, name: str, origin: str) -> str|None:
+    candidates = [name] if name.endswith('.lart') else [name + '.lart', name]
+    for directory in [os.path.dirname(origin)] + self.include_directories:
+      for candidate in candidates:
+        path = os.path.normpath(os.path.join(directory, candidate))
+        if os.path.isfile(path):
+          return path
+    return None
+
+  def scan(self, path: str) -> dict:
+    stat = os.stat(path)
+    with self.lock:
+      entry = self.files.get(path)
+    if entry is not None and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+      return entry
+    with open(path, 'rb') as file:
+      content = file.read()
+    includes = []
+    for name in IncludeGraph.DIRECTIVE.findall(IncludeGraph.COMMENT.sub('', content.decode(errors='replace'))):
+      include = self.resolve(name, path)
+      if include is not None and include not in includes:
+        includes.append(include)
+    entry = {
+      'mtime': stat.st_mtime_ns,
+      'size': stat.st_size,
+      'digest': hashlib.sha256(content).hexdigest(),
+      'includes': includes,
+    }
+    with self.lock:
+      self.files[path] = entry
+      self.dirty = True
+    return entry
+
+  def closure(self, source: str) -> list[str]:
+    visited: set[str] = set()
+    pending = [os.path.normpath(source)]
+    while len(pending) > 0:
+      path = pending.pop()
+      if path in visited or not os.path.isfile(path):
+        continue
+      visited.add(path)
+      pending += self.scan(path)['includes']
+    return sorted(visited)
+
+  def digest(self, source: str) -> str:
+    source = os.path.normpath(source)
+    includes = sorted([self.scan(path)['digest'] for path in self.closure(source) if path != source])
+    return BuildCache.key(self.scan(source)['digest'], *includes)
+
+class Outcome(enum.Enum):
+  PASS='PASS'
+  ERROR='ERROR'
+  TIMEOUT='TIMEOUT'
+  OOM='OOM'
+  SLOW='SLOW'
+  LARGE='LARGE'
+
+  def __bool__(self) -> bool:
+    return self == Outcome.PASS
+
+  def color(self) -> TextColor:
+    if self == Outcome.PASS:
+      return TextColor.GREEN
+    elif self == Outcome.ERROR:
+      return TextColor.RED
+    return TextColor.PURPLE
+
+  def inverted(self) -> Outcome:
+    if self == Outcome.PASS:
+      return Outcome.ERROR
+    elif self == Outcome.ERROR:
+      return Outcome.PASS
+    return self
+
+  @staticmethod
+  def of(esit: bool|Outcome) -> Outcome:
+    if isinstance(esit, Outcome):
+      return esit
+    return Outcome.PASS if esit else Outcome.ERROR
+
+class Limits:
+  def __init__(self, timeout: float|None = None, cpu: int|None = None, memory: int|None = None) -> None:
+    self.timeout: float|None = timeout
+    self.cpu: int|None = cpu
+    self.memory: int|None = memory
+
+  def to_dict(self) -> dict:
+    return {
+      'timeout': self.timeout,
+      'cpu': self.cpu,
+      'memory': self.memory,
+    }
+
+  @staticmethod
+  def from_dict(data: dict) -> Limits:
+    return Limits(
+      timeout = data.get('timeout'),
+      cpu = data.get('cpu'),
+      memory = data.get('memory'),
+    )
+
+  def merge(self, other: Limits|None) -> Limits:
+    if other is None:
+      return self
+    return Limits(
+      timeout = (other.timeout if other.timeout is not None else self.timeout),
+      cpu = (other.cpu if other.cpu is not None else self.cpu),
+      memory = (other.memory if other.memory is not None else self.memory),
+    )
+
+  def restricts(self) -> bool:
+    return self.cpu is not None or self.memory is not None
+
+class Result:
+  def __init__(self, returncode: int, wall: float, rusage: resource.struct_rusage|None, limits: Limits|None = None, expired: bool = False, maxrss: int = 0, exhausted: bool = False) -> None:
+    self.returncode: int = returncode
+    self.wall: float = wall
+    self.rusage: resource.struct_rusage|None = rusage
+    self.limits: Limits|None = limits
+    self.expired: bool = expired
+    self.maxrss: int = maxrss
+    self.exhausted: bool = exhausted
+
+  @property
+  def ok(self) -> bool:
+    return self.returncode == 0
+
+  @property
+  def signal(self) -> int|None:
+    return -self.returncode if self.returncode < 0 else None
+
+  @property
+  def user(self) -> float:
+    return self.rusage.ru_utime if self.rusage is not None else 0.0
+
+  @property
+  def system(self) -> float:
+    return self.rusage.ru_stime if self.rusage is not None else 0.0
+
+  @property
+  def outcome(self) -> Outcome:
+    if self.ok:
+      return Outcome.PASS
+    if self.expired:
+      return Outcome.TIMEOUT
+    if self.limits is not None:
+      if self.limits.cpu is not None and (self.signal == signal.SIGXCPU or self.user + self.system >= self.limits.cpu):
+        return Outcome.TIMEOUT
+      if self.limits.memory is not None and self.exhausted:
+        return Outcome.OOM
+    return Outcome.ERROR
+
+  def to_dict(self) -> dict:
+    return {
+      'returncode': self.returncode,
+      'signal': self.signal,
+      'wall': self.wall,
+      'user': self.user,
+      'system': self.system,
+      'maxrss': self.maxrss,
+      'outcome': self.outcome.value,
+    }
+
+class CMD:
+  running: dict[subprocess.Popen, bool] = {}
+  running_lock = threading.Lock()
+  helpers: Callable[[bool], tuple[str, str|None]]|None = None
+
+  def __init__(self, cmd: str) -> None:
+    self.cmd: str = cmd
+    self.args: list[str] = []
+    self.stdin: str|None = None
+    self.stdout: str|None = None
+    self.stderr: str|None = None
+    self.limits: Limits|None = None
+    self.env: dict[str, str] = {}
+    self.measure: bool = False
+
+  def append(self, argx: str|list[str]):
+    assert isinstance(argx, str) or isinstance(argx, list)
+    if isinstance(argx, str):
+      self.args.append(argx)
+    elif isinstance(argx, list):
+      for arg in argx:
+        assert isinstance(arg, str)
+        self.args.append(arg)
+
+  def assemble(self) -> str:
+    cmdline = shlex.join(['%s=%s' % (key, value) for (key, value) in self.env.items()] + [self.cmd] + self.args)
+    if self.stdin is not None:
+      cmdline += ' < ' + shlex.quote(self.stdin)
+    if self.stdout is not None and self.stdout == self.stderr:
+      cmdline += ' &> ' + shlex.quote(self.stdout)
+    else:
+      if self.stdout is not None:
+        cmdline += ' > ' + shlex.quote(self.stdout)
+      if self.stderr is not None:
+        cmdline += ' 2> ' + shlex.quote(self.stderr)
+    return cmdline
+
+  @staticmethod
+  def kill(process: subprocess.Popen, group: bool) -> None:
+    try:
+      if group:
+        os.killpg(process.pid, signal.SIGKILL)
+      else:
+        os.kill(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+      pass
+
+  @staticmethod
+  def kill_all() -> None:
+    with CMD.running_lock:
+      for process, group in CMD.running.items():
+        CMD.kill(process, group)
+
+  def exec(self, verbose: bool, consumer: Callable[[bytes], bool]|None = None) -> Result:
+    if verbose:
+      with CONSOLE_LOCK:
+        print('|>', self.assemble())
+    stdin = open(self.stdin, 'rb') if self.stdin is not None else None
+    if consumer is not None:
+      stdout = subprocess.PIPE
+    else:
+      stdout = create_output(self.stdout) if self.stdout is not None else None
+    if self.stderr is not None and self.stderr == self.stdout:
+      stderr = subprocess.STDOUT
+    else:
+      stderr = create_output(self.stderr) if self.stderr is not None else None
+    limits = self.limits
+    argv = [self.cmd] + self.args
+    report = None
+    if CMD.helpers is not None and ((limits is not None and limits.restricts()) or self.measure):
+      launcher, oom_shim = CMD.helpers(limits is not None and limits.memory is not None)
+      report, report_fd = os.pipe()
+      cpu = ('%d' % (limits.cpu,) if limits is not None and limits.cpu is not None else '-')
+      memory = ('%d' % (limits.memory,) if limits is not None and limits.memory is not None else '-')
+      argv = [launcher, str(report_fd), cpu, memory, oom_shim or '-'] + ['%s=%s' % (key, value) for (key, value) in self.env.items()] + ['--'] + argv
+    elif limits is not None and limits.restricts():
+      raise ValueError('Cannot apply the cpu and memory limits of `%s` without the process launcher' % (self.cmd,))
+    start = time.perf_counter()
+    try:
+      try:
+        process = subprocess.Popen(argv, stdin=stdin, stdout=stdout, stderr=stderr,
+          env=({**os.environ, **self.env} if len(self.env) > 0 and report is None else None),
+          pass_fds=((report_fd,) if report is not None else ()),
+          start_new_session=(limits is not None))
+      except OSError as error:
+        message = '%s: %s\n' % (self.cmd, error.strerror)
+        target = stdout if stderr == subprocess.STDOUT else stderr
+        if target is not None and target != subprocess.PIPE:
+          target.write(message.encode())
+        else:
+          sys.stderr.write(message)
+        return Result(127, time.perf_counter() - start, None, limits)
+      finally:
+        if report is not None:
+          os.close(report_fd)
+      with CMD.running_lock:
+        CMD.running[process] = (limits is not None)
+      expired = threading.Event()
+      timer = None
+      if limits is not None and limits.timeout is not None:
+        def expire() -> None:
+          expired.set()
+          CMD.kill(process, True)
+        timer = threading.Timer(limits.timeout, expire)
+        timer.daemon = True
+        timer.start()
+      try:
+        if consumer is not None:
+          while True:
+            chunk = os.read(process.stdout.fileno(), 1 << 16)
+            if len(chunk) == 0:
+              break
+            if not consumer(chunk):
+              CMD.kill(process, limits is not None)
+              break
+          process.stdout.close()
+        _, status, rusage = os.wait4(process.pid, 0)
+      except BaseException:
+        CMD.kill(process, limits is not None)
+        process.wait()
+        raise
+      finally:
+        if timer is not None:
+          timer.cancel()
+        with CMD.running_lock:
+          CMD.running.pop(process, None)
+      process.returncode = os.waitstatus_to_exitcode(status)
+      maxrss = 0
+      exhausted = False
+      if report is not None:
+        for line in CMD.drain(report).decode(errors='replace').splitlines():
+          fields = line.split()
+          if fields == ['oom']:
+            exhausted = True
+          elif len(fields) == 2 and fields[0] == 'maxrss':
+            maxrss = int(fields[1]) * 1024
+      return Result(process.returncode, time.perf_counter() - start, rusage, limits, expired.is_set(), maxrss, exhausted)
+    finally:
+      for file in [stdin, stdout, stderr]:
+        if file is not None and file not in [subprocess.STDOUT, subprocess.PIPE]:
+          file.close()
+      if report is not None:
+        os.close(report)
+
+  @staticmethod
+  def drain(fd: int) -> bytes:
+    os.set_blocking(fd, False)
+    chunks: list[bytes] = []
+    try:
+      while True:
+        chunk = os.read(fd, 1 << 12)
+        if len(chunk) == 0:
+          break
+        chunks.append(chunk)
+    except BlockingIOError:
+      pass
+    return b''.join(chunks)
+
+class Compiler:
+  def __init__(self, path: str, include_directories: list[str], options: list[str]) -> None:
+    self.path: str = path
+    self.include_directories: list[str] = include_directories
+    self.options: list[str] = options
+    self.digest: str|None = None
+    self.include_digest: str|None = None
+    self.digest_lock = threading.Lock()
+
+  def to_dict(self) -> dict:
+    return {
+      'path': self.path,
+      'include_directories': self.include_directories,
+      'options': self.options,
+    }
+
+  @staticmethod
+  def from_dict(data: dict) -> Compiler:
+    return Compiler(
+      path = data['path'],
+      include_directories = data['include_directories'],
+      options = data['options'],
+    )
+
+  def fingerprint(self) -> str:
+    with self.digest_lock:
+      if self.digest is None:
+        binary = shutil.which(self.path) or self.path
+        parts = [json.dumps(self.to_dict(), sort_keys=True)]
+        parts.append(hash_file(binary) if os.path.isfile(binary) else '')
+        self.digest = BuildCache.key(*parts)
+      return self.digest
+
+  def include_fingerprint(self) -> str:
+    with self.digest_lock:
+      if self.include_digest is None:
+        self.include_digest = BuildCache.key(*[hash_tree(include_directory) for include_directory in self.include_directories])
+      return self.include_digest
+
+  def compile(self, sources: list[str], links: list[str], output: str, verbose: bool, complaint: str, limits: Limits|None = None, measure: bool = False) -> Result:
+    if os.path.lexists(output):
+      os.remove(output)
+    cmd = CMD(self.path)
+    cmd.append(['-I' + include_directory for include_directory in self.include_directories])
+    cmd.append(['-l' + link for link in links])
+    cmd.append(sources)
+    cmd.append(self.options)
+    cmd.append(['-o', output])
+    if output.endswith('.o'):
+      cmd.append('-c')
+    cmd.stdout = complaint
+    cmd.stderr = complaint
+    cmd.limits = limits
+    cmd.measure = measure
+
+    return cmd.exec(verbose)
+
+class TestKind(enum.Enum):
+  SUCC='succ'
+  DIFF='diff'
+  FAIL='fail'
+  PERF='perf'
+
+  @staticmethod
+  def values() -> list[str]:
+    return [_.value for _ in list(TestKind)]
+
+  @staticmethod
+  def enums() -> list[TestKind]:
+    return list(TestKind)
+  
+  @staticmethod
+  def parse(value: str) -> TestKind:
+    for e in TestKind.enums():
+      if e.value == value:
+        return e
+    raise ValueError('Value `%s` is not valid ofr TestKind' % (value,))
+
+def generate_lart(shape: str, size: int) -> dict[str, str]:
+  prologue = 'typedef i64 = integer<64, true>;\n\n'
+  if shape == 'functions':
+    lines = ['fn f0(x: i64) -> i64 {\n  return x;\n}\n']
+    lines += ['fn f%d(x: i64) -> i64 {\n  return f%d(x) + %d;\n}\n' % (i, i - 1, i % 7) for i in range(1, size)]
+    lines.append('fn main() -> i64 {\n  return f%d(0) - f%d(0);\n}\n' % (size - 1, size - 1))
+    return {'source.lart': prologue + '\n'.join(lines)}
+  if shape == 'includes':
+    files = {'chain-%d.lart' % (i,): 'include "chain-%d";\ntypedef t%d = integer<64, true>;\n' % (i + 1, i) for i in range(size - 1)}
+    files['chain-%d.lart' % (size - 1,)] = 'typedef t%d = integer<64, true>;\n' % (size - 1,)
+    files['source.lart'] = prologue + 'include "chain-0";\n\nfn main() -> i64 {\n  let x: t%d = 0;\n  return x;\n}\n' % (size - 1,)
+    return files
+  if shape == 'structs':
+    fields = ',\n'.join(['  f%d: i64' % (i,) for i in range(size)])
+    return {'source.lart': prologue + 'typedef S = struct {\n%s\n};\n\nfn main() -> i64 {\n  let s: S;\n  let p: &S = &s;\n  p->f%d = 0;\n  return p->f%d;\n}\n' % (fields, size - 1, size - 1)}
+  if shape == 'expressions':
+    expression = ' + '.join(['(x * %d - %d)' % (i % 5 + 1, i % 3) for i in range(size)])
+    return {'source.lart': prologue + 'fn main() -> i64 {\n  let x: i64 = 0;\n  let y: i64 = %s;\n  return y - y;\n}\n' % (expression,)}
+  if shape == 'globals':
+    globals = '\n'.join(['global var g%d: i64 = %d;' % (i, i) for i in range(size)])
+    return {'source.lart': prologue + '%s\n\nfn main() -> i64 {\n  return g0;\n}\n' % (globals,)}
+  raise ValueError('Unknown program shape `%s`: expected one of functions, includes, structs, expressions, globals' % (shape,))
+
+def split_declarations(content: str) -> list[str]:
+  declarations: list[str] = []
+  current: list[str] = []
+  depth = 0
+  for line in content.splitlines(keepends=True):
+    current.append(line)
+    code = re.sub(r'"(\\.|[^"\\])*"|\'(\\.|[^\'\\])*\'|//.*', '', line).strip()
+    depth += code.count('{') - code.count('}')
+    if depth <= 0 and (code.endswith(';') or code.endswith('}')):
+      declarations.append(''.join(current))
+      current = []
+      depth = 0
+  if len(current) > 0:
+    declarations.append(''.join(current))
+  return declarations
+
+def ddmin(items: list[str], failing: Callable[[list[list[str]]], list[bool]]) -> list[str]:
+  granularity = 2
+  while len(items) >= 2:
+    size = len(items) / granularity
+    chunks = [items[int(index * size):int((index + 1) * size)] for index in range(granularity)]
+    subsets = [chunk for chunk in chunks if 0 < len(chunk) < len(items)]
+    complements = [items[:int(index * size)] + items[int((index + 1) * size):] for index in range(granularity)]
+    complements = [complement for complement in complements if 0 < len(complement) < len(items)]
+    verdicts = failing(subsets + complements)
+    if any(verdicts[:len(subsets)]):
+      items = subsets[verdicts.index(True)]
+      granularity = 2
+    elif any(verdicts[len(subsets):]):
+      items = complements[verdicts[len(subsets):].index(True)]
+      granularity = max(granularity - 1, 2)
+    elif granularity < len(items):
+      granularity = min(granularity * 2, len(items))
+    else:
+      break
+  return items
+
+def growth_exponent(sizes: list[int], values: list[float]) -> float:
+  points = [(size, value) for (size, value) in zip(sizes, values) if size > 0 and value > 0]
+  if len(points) < 2:
+    return float('nan')
+  return statistics.linear_regression([math.log(size) for (size, _) in points], [math.log(value) for (_, value) in points]).slope
+
+class Scale:
+  def __init__(self, shape: str, sizes: list[int], repeat: int = 3) -> None:
+    self.shape: str = shape
+    self.sizes: list[int] = sizes
+    self.repeat: int = repeat
+
+  def to_dict(self) -> dict:
+    return {
+      'shape': self.shape,
+      'sizes': self.sizes,
+      'repeat': self.repeat,
+    }
+
+  @staticmethod
+  def from_dict(data: dict) -> Scale:
+    return Scale(
+      shape = data['shape'],
+      sizes = (data.get('sizes') or [1000, 2000, 4000, 8000]),
+      repeat = (data.get('repeat') or 3),
+    )
+
+class Test:
+  def __init__(self, kind: TestKind, name: str, path: str, sources: list[str], links: list[str], program: str, args: list[str], inputs: list[str], reference: str, output: str, limits: dict[str, Limits]|None = None, scale: Scale|None = None) -> None:
+    self.kind: TestKind = kind
+    self.name: str = name
+    self.path: str = path
+    self.sources: list[str] = sources
+    self.links: list[str] = links
+    self.program: str = program
+    self.args: list[str] = args
+    self.inputs: list[str] = inputs
+    self.reference: str = reference
+    self.output: str = output
+    self.limits: dict[str, Limits] = (limits or {})
+    self.scale: Scale|None = scale
+    self.records: list[dict] = []
+    self.phase_start: float = 0.0
+    self.phase_results: list[Result] = []
+    self.phase_messages: list[str] = []
+    self.cancelled: threading.Event|None = None
+
+  @staticmethod
+  def discover(path: str) -> Test:
+    if not os.path.exists(path):
+      raise ValueError('Cannot discover test in `%s` because the directory doesn\'t exist' % (path,))
+    path_pieces = path.split('/')
+    
+    if len(path_pieces) < 2:
+      raise ValueError('Cannot discover test if the path `%s` isn\'t in the correct format: `[<dir/]<kind>/<name>`' % (path,))
+    
+    kind = path_pieces[-2]
+    name = path_pieces[-1]
+
+    if kind not in TestKind.values():
+      raise ValueError('The test kind `%s` isn\'t among the recognized ones: %s' % (kind, TestKind.values()))
+
+    reference = 'program.ref'
+    sources = []
+    links = []
+    inputs = []
+    args = []
+    for file in os.listdir(path):
+      ext = file.split('.')[-1]
+      if ext in ['c', 'o', 'lart', 's', 'll']:
+        sources.append(file)
+      elif ext in ['in']:
+        inputs.append(file)
+      elif ext in ['ref']:
+        reference = file
+      elif ext in ['cli']:
+        args.append(file)
+
+    scale = None
+    if kind == TestKind.PERF.value:
+      scale_path = os.path.join(path, 'scale.yml')
+      scale = Scale.from_dict(read_yaml(scale_path) if os.path.exists(scale_path) else {'shape': name})
+
+    program = 'program.exe'
+    output = 'program.out'
+    return Test(TestKind.parse(kind), name, path, sources, links, program, args, inputs, reference, output, scale=scale)
+
+
+  def compile(self, framework: Framework, compiler: Compiler, phase: str, sources: list[str], links: list[str], output: str, complaint: str) -> Result:
+    results: list[Result] = []
+    for _ in range(max(framework.profile_repeat, 1)):
+      results.append(compiler.compile(sources, links, output, verbose=framework.verbose, complaint=complaint, limits=framework.limits_for(self, 'build'), measure=(framework.profile_repeat > 0)))
+      self.phase_results.append(results[-1])
+      if not results[-1].ok:
+        self.note('%s exited with %d\n%s' % (compiler.path, results[-1].returncode, tail_excerpt(complaint)))
+        break
+    framework.profile.record(self, 'cc' if compiler is framework.cc else 'lartc', phase, output, results)
+    return results[-1]
+
+  def build_object(self, framework: Framework, compiler: Compiler, source: str, output: str, complaint: str) -> tuple[Outcome, str]:
+    if not os.path.exists(source):
+      self.note('%s: no such file' % (source,))
+      return (Outcome.ERROR, '')
+    if source.endswith('.lart'):
+      dependencies = framework.includes.digest(source)
+    else:
+      dependencies = BuildCache.key(compiler.include_fingerprint(), hash_file(source))
+    key = BuildCache.key('object', compiler.fingerprint(), os.path.splitext(source)[1], dependencies)
+    if framework.profile_repeat == 0 and framework.cache.restore(key, [output, complaint]):
+      return (Outcome.PASS, key)
+    with framework.building_lock:
+      building = framework.building.get(key)
+      if building is None:
+        framework.building[key] = threading.Event()
+    if building is not None and framework.profile_repeat == 0:
+      building.wait()
+      if framework.cache.restore(key, [output, complaint]):
+        return (Outcome.PASS, key)
+    try:
+      result = self.compile(framework, compiler, 'object', [source], [], output, complaint)
+      if not result.ok:
+        return (result.outcome, '')
+      framework.cache.store(key, [output, complaint])
+      return (Outcome.PASS, key)
+    finally:
+      if building is None:
+        with framework.building_lock:
+          framework.building.pop(key).set()
+
+  def build_program(self, framework: Framework, objects: dict[str, str], output: str, complaint: str) -> Outcome:
+    key = BuildCache.key('program', framework.lartc.fingerprint(), *sorted(objects.values()), *self.links)
+    if framework.profile_repeat == 0 and framework.cache.restore(key, [output, complaint]):
+      return Outcome.PASS
+    result = self.compile(framework, framework.lartc, 'link', list(objects.keys()), self.links, output, complaint)
+    if not result.ok:
+      return result.outcome
+    framework.cache.store(key, [output, complaint])
+    return Outcome.PASS
+
+  def build(self, framework: Framework) -> Outcome:
+    sources = [os.path.join(self.path, source) for source in self.sources]
+    c_sources = list(filter(lambda f: f.endswith('.c'), sources))
+    lart_sources = list(filter(lambda f: f.endswith('.lart'), sources))
+    ll_sources = list(filter(lambda f: f.endswith('.ll'), sources))
+    s_sources = list(filter(lambda f: f.endswith('.s'), sources))
+    o_sources = {f: hash_file(f) for f in filter(lambda f: f.endswith('.o'), sources)}
+    os.makedirs(self.workdir(framework), exist_ok=True)
+
+    complains = []
+    for c_source in c_sources:
+      o_source = self.artifact(framework, os.path.basename(c_source).replace('.c', '.o'))
+      if os.path.basename(o_source) in [os.path.basename(o) for o in o_sources]:
+        raise ValueError('Conflicting CC::out vs LARTC::in => `%s`' % (o_source,))
+      complains.append(o_source.replace('.o', '.com'))
+      outcome, key = self.build_object(framework, framework.cc, c_source, o_source, complains[-1])
+      if not outcome:
+        return outcome
+      o_sources[o_source] = key
+
+    for lart_source in lart_sources:
+      o_source = self.artifact(framework, os.path.basename(lart_source).replace('.lart', '.o'))
+      if os.path.basename(o_source) in [os.path.basename(o) for o in o_sources]:
+        raise ValueError('Conflicting LARTC::out vs LARTC::in => `%s`' % (o_source,))
+      complains.append(o_source.replace('.o', '.com'))
+      outcome, key = self.build_object(framework, framework.lartc, lart_source, o_source, complains[-1])
+      if not outcome:
+        return outcome
+      o_sources[o_source] = key
+
+    for ll_source in ll_sources:
+      o_source = self.artifact(framework, os.path.basename(ll_source).replace('.ll', '.o'))
+      if os.path.basename(o_source) in [os.path.basename(o) for o in o_sources]:
+        raise ValueError('Conflicting LLVMIR::out vs LARTC::in => `%s`' % (o_source,))
+      complains.append(o_source.replace('.o', '.com'))
+      outcome, key = self.build_object(framework, framework.lartc, ll_source, o_source, complains[-1])
+      if not outcome:
+        return outcome
+      o_sources[o_source] = key
+
+    for s_source in s_sources:
+      o_source = self.artifact(framework, os.path.basename(s_source).replace('.s', '.o'))
+      if os.path.basename(o_source) in [os.path.basename(o) for o in o_sources]:
+        raise ValueError('Conflicting AS::out vs LARTC::in => `%s`' % (o_source,))
+      complains.append(o_source.replace('.o', '.com'))
+      outcome, key = self.build_object(framework, framework.lartc, s_source, o_source, complains[-1])
+      if not outcome:
+        return outcome
+      o_sources[o_source] = key
+
+    program = self.artifact(framework, self.program)
+    complains.append(program.replace('.exe', '.com'))
+    return self.build_program(framework, o_sources, program, complains[-1])
+
+  def command(self, framework: Framework) -> CMD:
+    program = self.artifact(framework, self.program)
+    cmd = CMD(program)
+    cmd.append(self.args)
+    for input in self.inputs:
+      cmd.stdin = os.path.join(self.path, input)
+    cmd.stdout = self.artifact(framework, self.output)
+    cmd.limits = framework.limits_for(self, 'run')
+    return cmd
+
+  def run(self, framework: Framework) -> Outcome:
+    assert self.kind in [TestKind.SUCC, TestKind.DIFF]
+    result = self.command(framework).exec(framework.verbose)
+    self.phase_results.append(result)
+    if not result.ok:
+      self.note('%s exited with %d' % (self.program, result.returncode))
+    return result.outcome
+
+  def run_and_compare(self, framework: Framework) -> tuple[Outcome, bool]:
+    assert self.kind in [TestKind.DIFF]
+    output_path = self.artifact(framework, self.output)
+    reference_path = os.path.join(self.path, self.reference)
+
+    if not os.path.exists(reference_path):
+      self.note('cannot compare because %s was never consolidated' % (reference_path,))
+      return (Outcome.ERROR, False)
+
+    comparator = StreamComparator(reference_path, output_path)
+    try:
+      result = self.command(framework).exec(framework.verbose, comparator.feed)
+    finally:
+      mismatch = comparator.finish()
+    self.phase_results.append(result)
+    if not result.ok and not comparator.stopped:
+      self.note('%s exited with %d' % (self.program, result.returncode))
+    if mismatch is None:
+      return (result.outcome, True)
+    offset, line = mismatch
+    message = '%s and %s differ: byte %d, line %d\n%s' % (output_path, reference_path, offset + 1, line, diff_excerpt(output_path, reference_path, line))
+    self.note(message)
+    with CONSOLE_LOCK:
+      print(message, end='')
+    return (Outcome.PASS if comparator.stopped else result.outcome, False)
+
+  def bench(self, framework: Framework) -> tuple[Outcome, Benchmark|None]:
+    assert self.kind in [TestKind.SUCC, TestKind.DIFF]
+    program = self.artifact(framework, self.program)
+
+    if not os.path.exists(program):
+      self.note('cannot benchmark because %s was never built' % (program,))
+      return (Outcome.ERROR, None)
+
+    results: list[Result] = []
+    for iteration in range(framework.warmup + framework.repeat):
+      cmd = self.command(framework)
+      cmd.stdout = os.devnull
+      cmd.measure = True
+      result = cmd.exec(framework.verbose)
+      self.phase_results.append(result)
+      if not result.ok:
+        return (result.outcome, None)
+      if iteration >= framework.warmup:
+        results.append(result)
+    return (Outcome.PASS, Benchmark.collect(results))
+
+  def perf(self, framework: Framework) -> tuple[Outcome, dict|None]:
+    assert self.kind in [TestKind.PERF] and self.scale is not None
+    curve: dict[str, list] = {'sizes': [], 'lines': [], 'wall': [], 'maxrss': []}
+    for size in self.scale.sizes:
+      directory = self.artifact(framework, 'scale-%d' % (size,))
+      os.makedirs(directory, exist_ok=True)
+      lines = 0
+      for file, content in generate_lart(self.scale.shape, size).items():
+        with open(os.path.join(directory, file), 'w') as stream:
+          stream.write(content)
+        lines += content.count('\n')
+      source = os.path.join(directory, 'source.lart')
+      results: list[Result] = []
+      for _ in range(max(self.scale.repeat, 1)):
+        result = framework.lartc.compile([source], [], os.path.join(directory, 'source.o'), framework.verbose, os.path.join(directory, 'source.com'), framework.limits_for(self, 'build'), measure=True)
+        self.phase_results.append(result)
+        if not result.ok:
+          self.note('%s failed at size %d\n%s' % (framework.lartc.path, size, tail_excerpt(os.path.join(directory, 'source.com'))))
+          return (result.outcome, None)
+        results.append(result)
+      curve['sizes'].append(size)
+      curve['lines'].append(lines)
+      curve['wall'].append(min([result.wall for result in results]))
+      curve['maxrss'].append(min([result.maxrss for result in results]))
+    curve['exponents'] = {metric: growth_exponent(curve['sizes'], curve[metric]) for metric in ['wall', 'maxrss']}
+    if curve['exponents']['wall'] > framework.max_exponent:
+      self.note('compile time grows as size^%.2f' % (curve['exponents']['wall'],))
+      return (Outcome.SLOW, curve)
+    return (Outcome.PASS, curve)
+
+  def memprofile(self, framework: Framework, shim: str) -> tuple[Outcome, dict|None]:
+    assert self.kind in [TestKind.SUCC, TestKind.DIFF]
+    report = self.artifact(framework, 'program.mem')
+    if os.path.exists(report):
+      os.remove(report)
+    cmd = self.command(framework)
+    cmd.stdout = os.devnull
+    cmd.env = {'LD_PRELOAD': shim, 'LART_MEMPROFILE_OUTPUT': os.path.abspath(report)}
+    cmd.measure = True
+    result = cmd.exec(framework.verbose)
+    self.phase_results.append(result)
+    if not result.ok:
+      self.note('%s exited with %d' % (self.program, result.returncode))
+      return (result.outcome, None)
+    if not os.path.exists(report):
+      self.note('%s exited without writing %s, is it statically linked?' % (self.program, report))
+      return (Outcome.ERROR, None)
+    with open(report) as file:
+      return (Outcome.PASS, json.load(file))
+
+  def ir_metrics(self, framework: Framework) -> tuple[Outcome, dict[str, dict]]:
+    directory = self.artifact(framework, 'ir')
+    os.makedirs(directory, exist_ok=True)
+    compiler = Compiler(framework.lartc.path, framework.lartc.include_directories, framework.lartc.options + framework.ir.options)
+    functions: dict[str, dict] = {}
+    for source in self.sources:
+      if not source.endswith('.lart'):
+        continue
+      stem = os.path.splitext(source)[0]
+      output = os.path.join(directory, stem + framework.ir.extension)
+      complaint = os.path.join(directory, stem + '.com')
+      result = compiler.compile([os.path.join(self.path, source)], [], output, framework.verbose, complaint, framework.limits_for(self, 'build'))
+      self.phase_results.append(result)
+      if not result.ok or not os.path.isfile(output):
+        self.note('%s could not emit IR for %s\n%s' % (compiler.path, source, tail_excerpt(complaint)))
+        return (result.outcome if not result.ok else Outcome.ERROR, functions)
+      for function, metrics in IrMetrics.parse(output).functions.items():
+        functions['%s:%s' % (source, function)] = metrics
+    return (Outcome.PASS, functions)
+
+  def sizes(self, framework: Framework) -> dict[str, dict]:
+    files = [artifact for artifact in self.artifacts(framework) if artifact.endswith('.o') or artifact.endswith('.exe')]
+    sizes: dict[str, dict] = {}
+    for file in files:
+      if os.path.isfile(file):
+        elf = ElfFile(file)
+        sizes[os.path.basename(file)] = {'sections': elf.sections, 'functions': elf.functions}
+    return sizes
+
+  def consolidate(self, framework: Framework) -> bool:
+    assert self.kind in [TestKind.DIFF]
+    output_path = self.artifact(framework, self.output)
+    reference_path = os.path.join(self.path, self.reference)
+
+    if not os.path.exists(output_path):
+      self.note('cannot consolidate because %s was never written by a run' % (output_path,))
+      return False
+
+    copy_atomic(output_path, reference_path)
+    return True
+
+  def compare(self, framework: Framework) -> bool:
+    assert self.kind in [TestKind.DIFF]
+    output_path = self.artifact(framework, self.output)
+    reference_path = os.path.join(self.path, self.reference)
+
+    if not os.path.exists(output_path):
+      self.note('cannot compare because %s was never written by a run' % (output_path,))
+      return False
+
+    if not os.path.exists(reference_path):
+      self.note('cannot compare because %s was never consolidated' % (reference_path,))
+      return False
+
+    mismatch = compare_files(output_path, reference_path)
+    if mismatch is None:
+      return True
+    offset, line = mismatch
+    message = '%s and %s differ: byte %d, line %d\n%s' % (output_path, reference_path, offset + 1, line, diff_excerpt(output_path, reference_path, line))
+    self.note(message)
+    with CONSOLE_LOCK:
+      print(message, end='')
+    return False
+
+  def source_size(self) -> int:
+    size = 0
+    for source in self.sources:
+      path = os.path.join(self.path, source)
+      if os.path.isfile(path):
+        size += os.path.getsize(path)
+    return size
+
+  def workdir(self, framework: Framework) -> str:
+    if framework.build_dir is None:
+      return self.path
+    return os.path.join(framework.build_dir, framework.namespace(), self.kind.value, self.name)
+
+  def artifact(self, framework: Framework, name: str) -> str:
+    return os.path.join(self.workdir(framework), name)
+
+  def artifacts(self, framework: Framework) -> list[str]:
+    artifacts: list[str] = []
+    for source in self.sources:
+      stem, extension = os.path.splitext(self.artifact(framework, source))
+      if extension in ['.c', '.lart', '.ll', '.s']:
+        artifacts += [stem + '.o', stem + '.com']
+    program = self.artifact(framework, self.program)
+    artifacts += [program, program.replace('.exe', '.com'), program.replace('.exe', '.mem'), self.artifact(framework, self.output)]
+    if self.scale is not None:
+      artifacts += [self.artifact(framework, 'scale-%d' % (size,)) for size in self.scale.sizes]
+    artifacts.append(self.artifact(framework, 'ir'))
+    return artifacts
+
+  def clean(self, framework: Framework) -> None:
+    if framework.build_dir is not None:
+      if framework.verbose:
+        with CONSOLE_LOCK:
+          print('|>', shlex.join(['rm', '-rf', self.workdir(framework)]))
+      shutil.rmtree(self.workdir(framework), ignore_errors=True)
+      return
+    for artifact in self.artifacts(framework):
+      if os.path.isdir(artifact):
+        shutil.rmtree(artifact)
+      elif os.path.lexists(artifact):
+        os.remove(artifact)
+
+  def note(self, message: str) -> None:
+    self.phase_messages.append(message)
+
+  def begin(self, framework: Framework, phase: str):
+    self.phase_start = time.perf_counter()
+    self.phase_results = []
+    self.phase_messages = []
+    self.cancelled = framework.cancelled
+    if framework.jobs > 1 or not sys.stdout.isatty():
+      return
+    with CONSOLE_LOCK:
+      print('| %s | %s | %s | ....... |' % (
+        self.kind.name.ljust(6),
+        self.name.ljust(40),
+        phase.ljust(12)
+      ), end='\r', flush=True)
+
+  def end(self, phase: str, esit: bool|Outcome):
+    outcome = Outcome.of(esit)
+    if self.cancelled is not None and self.cancelled.is_set():
+      return
+    self.records.append({
+      'test': '%s/%s' % (self.kind.value, self.name),
+      'phase': phase,
+      'outcome': outcome.value,
+      'duration': time.perf_counter() - self.phase_start,
+      'user': sum([result.user for result in self.phase_results]),
+      'system': sum([result.system for result in self.phase_results]),
+      'maxrss': max([result.maxrss for result in self.phase_results] + [0]),
+      'returncode': (self.phase_results[-1].returncode if len(self.phase_results) > 0 else None),
+      'timestamp': time.time(),
+      'message': ('\n'.join(self.phase_messages) if not outcome else ''),
+    })
+    with CONSOLE_LOCK:
+      print('| %s | %s | %s | ' % (
+        self.kind.name.ljust(6),
+        self.name.ljust(40),
+        phase.ljust(12)
+      ), end='')
+      outcome.color().begin()
+      print(outcome.value.ljust(7), end='')
+      outcome.color().end()
+      print(' |', flush=True)
+
+  def report(self, framework: Framework) -> None:
+    print('#' * 20 + self.name.ljust(20) + '#' * 20)
+    with open(self.artifact(framework, self.output)) as file:
+      print(file.read())
+    print('#' * 20 + self.name.ljust(20) + '#' * 20)
+
+  def to_dict(self) -> dict:
+    data = {
+      'kind': self.kind.value,
+      'name': self.name,
+      'path': self.path,
+      'sources': self.sources,
+      'links': self.links,
+      'program': self.program,
+      'args': self.args,
+      'inputs': self.inputs,
+      'reference': self.reference,
+      'output': self.output,
+    }
+    if len(self.limits) > 0:
+      data['limits'] = {phase: limits.to_dict() for (phase, limits) in self.limits.items()}
+    if self.scale is not None:
+      data['scale'] = self.scale.to_dict()
+    return data
+
+  @staticmethod
+  def from_dict(data: dict) -> Test:
+    return Test(
+      kind = TestKind.parse(data['kind']),
+      name = data['name'],
+      path = data['path'],
+      sources = (data.get('sources') or []),
+      links = (data.get('links') or []),
+      program = (data.get('program') or 'program.exe'),
+      args = (data.get('args') or []),
+      inputs = (data.get('inputs') or []),
+      reference = (data.get('reference') or 'program.ref'),
+      output = (data.get('output') or 'program.out'),
+      limits = {phase: Limits.from_dict(limits) for (phase, limits) in (data.get('limits') or {}).items()},
+      scale = (Scale.from_dict(data['scale']) if 'scale' in data else None),
+    )
+
+class TestTable(collections.abc.MutableMapping):
+  def __init__(self, entries: dict[str, dict|Test]|None = None) -> None:
+    self.entries: dict[str, dict|Test] = (entries or {})
+
+  def __getitem__(self, name: str) -> Test:
+    entry = self.entries[name]
+    if not isinstance(entry, Test):
+      entry = Test.from_dict(entry)
+      self.entries[name] = entry
+    return entry
+
+  def __setitem__(self, name: str, test: Test) -> None:
+    self.entries[name] = test
+
+  def __delitem__(self, name: str) -> None:
+    del self.entries[name]
+
+  def __iter__(self):
+    return iter(self.entries)
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def __contains__(self, name: object) -> bool:
+    return name in self.entries
+
+  def materialized(self) -> list[Test]:
+    return [entry for entry in self.entries.values() if isinstance(entry, Test)]
+
+  def to_dicts(self) -> list[dict]:
+    return [(entry.to_dict() if isinstance(entry, Test) else entry) for entry in self.entries.values()]
+
+class Benchmark:
+  METRICS = ['wall', 'cpu', 'maxrss']
+
+  def __init__(self, samples: dict[str, list[float]]) -> None:
+    self.samples: dict[str, list[float]] = samples
+
+  @staticmethod
+  def collect(results: list[Result]) -> Benchmark:
+    return Benchmark({
+      'wall': [result.wall for result in results],
+      'cpu': [result.user + result.system for result in results],
+      'maxrss': [float(result.maxrss) for result in results],
+    })
+
+  def median(self, metric: str) -> float:
+    return statistics.median(self.samples[metric])
+
+  def mad(self, metric: str) -> float:
+    median = self.median(metric)
+    return statistics.median([abs(sample - median) for sample in self.samples[metric]])
+
+  def regressions(self, baseline: Benchmark, threshold: float = 0.05) -> list[str]:
+    slower = []
+    for metric in ['wall', 'cpu']:
+      base = baseline.median(metric)
+      noise = 3 * 1.4826 * max(baseline.mad(metric), self.mad(metric))
+      if self.median(metric) - base > max(noise, threshold * base):
+        slower.append(metric)
+    return slower
+
+  def delta(self, baseline: Benchmark, metric: str, resamples: int = 1000, confidence: float = 0.95) -> tuple[float, float, float]:
+    before = baseline.samples[metric]
+    after = self.samples[metric]
+    change = lambda before, after: statistics.median(after) / max(statistics.median(before), 1e-12) - 1
+    generator = random.Random(0)
+    estimates = sorted([change(generator.choices(before, k=len(before)), generator.choices(after, k=len(after))) for _ in range(resamples)])
+    tail = (1 - confidence) / 2
+    return (change(before, after), estimates[int(tail * (resamples - 1))], estimates[int((1 - tail) * (resamples - 1))])
+
+  def to_dict(self) -> dict:
+    return {metric: {
+      'median': self.median(metric),
+      'mad': self.mad(metric),
+      'samples': self.samples[metric],
+    } for metric in Benchmark.METRICS}
+
+  @staticmethod
+  def from_dict(data: dict) -> Benchmark:
+    return Benchmark({metric: data[metric]['samples'] for metric in Benchmark.METRICS})
+
+class History:
+  PHASES = ['BUILD', 'RUN', 'COMPARE']
+
+  def __init__(self, path: str) -> None:
+    self.path: str = path
+    self.run: float = time.time()
+    self.connection = sqlite3.connect(path, check_same_thread=False)
+    self.connection.execute('CREATE TABLE IF NOT EXISTS results (run REAL, test TEXT, phase TEXT, outcome TEXT, duration REAL, user REAL, system REAL, maxrss INTEGER, returncode INTEGER, compiler TEXT, timestamp REAL)')
+    self.connection.execute('CREATE INDEX IF NOT EXISTS results_by_test ON results (test, run)')
+    self.expected: dict[str, float]|None = None
+    self.failing: set[str]|None = None
+
+  def append(self, records: list[dict], compiler: str) -> None:
+    with self.connection:
+      self.connection.executemany('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [(
+        self.run,
+        record['test'],
+        record['phase'],
+        record['outcome'],
+        record['duration'],
+        record['user'],
+        record['system'],
+        record['maxrss'],
+        record['returncode'],
+        compiler,
+        record['timestamp'],
+      ) for record in records])
+
+  def runs(self, window: int = 10) -> dict[str, list[tuple[float, float, bool]]]:
+    runs: dict[str, list[tuple[float, float, bool]]] = {}
+    cursor = self.connection.execute(
+      'SELECT test, run, SUM(duration), MIN(outcome = \'PASS\') FROM results WHERE phase IN (%s) GROUP BY test, run ORDER BY test, run DESC' % (', '.join(['?'] * len(History.PHASES)),),
+      History.PHASES)
+    for test, run, duration, passed in cursor:
+      if len(runs.setdefault(test, [])) < window:
+        runs[test].append((run, duration, bool(passed)))
+    return runs
+
+  def load(self) -> None:
+    if self.expected is None or self.failing is None:
+      runs = self.runs()
+      self.expected = {test: statistics.median([duration for (_, duration, _) in samples]) for (test, samples) in runs.items()}
+      self.failing = {test for (test, samples) in runs.items() if not all([passed for (_, _, passed) in samples[:3]])}
+
+  def prioritize(self, targets: list[Test]) -> list[Test]:
+    self.load()
+    def priority(test: Test) -> tuple[bool, float]:
+      key = '%s/%s' % (test.kind.value, test.name)
+      return (key not in self.failing, -self.expected.get(key, float('inf')))
+    return sorted(targets, key=priority)
+
+  def trends(self, targets: list[Test]) -> None:
+    runs = self.runs()
+    print('| %s | %s | %s | %s | %s | %s | %s |' % ('KIND'.ljust(6), 'NAME'.ljust(40), 'RUNS'.rjust(4), 'LAST (s)'.rjust(9), 'MEDIAN (s)'.rjust(10), 'TREND'.rjust(8), 'FAILS'.rjust(5)))
+    for test in targets:
+      samples = runs.get('%s/%s' % (test.kind.value, test.name)) or []
+      if len(samples) == 0:
+        continue
+      durations = [duration for (_, duration, _) in reversed(samples)]
+      median = statistics.median(durations)
+      trend = ''
+      if len(durations) >= 4:
+        half = len(durations) // 2
+        older = statistics.median(durations[:half])
+        trend = '%+.1f%%' % (100 * (statistics.median(durations[half:]) / max(older, 1e-9) - 1),)
+      print('| %s | %s | %s | %s | %s | %s | %s |' % (
+        test.kind.name.ljust(6),
+        test.name.ljust(40),
+        str(len(samples)).rjust(4),
+        ('%.3f' % durations[-1]).rjust(9),
+        ('%.3f' % median).rjust(10),
+        trend.rjust(8),
+        str(len([_ for (_, _, passed) in samples if not passed])).rjust(5),
+      ))
+
+class CompileProfile:
+  def __init__(self) -> None:
+    self.records: list[dict] = []
+    self.lock = threading.Lock()
+
+  def record(self, test: Test, compiler: str, phase: str, output: str, results: list[Result]) -> None:
+    record = {
+      'test': '%s/%s' % (test.kind.value, test.name),
+      'compiler': compiler,
+      'phase': phase,
+      'output': output,
+      'outcome': results[-1].outcome.value,
+      'samples': len(results),
+      'wall': statistics.median([result.wall for result in results]),
+      'cpu': statistics.median([result.user + result.system for result in results]),
+      'maxrss': max([result.maxrss for result in results]),
+    }
+    with self.lock:
+      self.records.append(record)
+
+  def to_dict(self) -> dict:
+    return {
+      'records': self.records,
+    }
+
+  def summary(self, limit: int = 20) -> None:
+    print('| %s | %s | %s | %s | %s | %s |' % ('COMPILER'.ljust(8), 'PHASE'.ljust(6), 'OUTPUT'.ljust(60), 'WALL (ms)'.rjust(10), 'CPU (ms)'.rjust(10), 'MAXRSS (KiB)'.rjust(12)))
+    for record in sorted(self.records, key=lambda r: r['wall'], reverse=True)[:limit]:
+      print('| %s | %s | %s | %s | %s | %s |' % (
+        record['compiler'].ljust(8),
+        record['phase'].ljust(6),
+        record['output'][-60:].ljust(60),
+        ('%.1f' % (1000 * record['wall'],)).rjust(10),
+        ('%.1f' % (1000 * record['cpu'],)).rjust(10),
+        ('%d' % (record['maxrss'] / 1024,)).rjust(12),
+      ))
+    totals: dict[tuple[str, str], list[float]] = {}
+    for record in self.records:
+      total = totals.setdefault((record['compiler'], record['phase']), [0, 0.0, 0.0])
+      total[0] += 1
+      total[1] += record['wall']
+      total[2] += record['cpu']
+    print('| %s | %s | %s | %s | %s |' % ('COMPILER'.ljust(8), 'PHASE'.ljust(6), 'COUNT'.rjust(6), 'WALL (s)'.rjust(10), 'CPU (s)'.rjust(10)))
+    for (compiler, phase), (count, wall, cpu) in sorted(totals.items()):
+      print('| %s | %s | %s | %s | %s |' % (compiler.ljust(8), phase.ljust(6), str(count).rjust(6), ('%.3f' % wall).rjust(10), ('%.3f' % cpu).rjust(10)))
+
+class IrStage:
+  def __init__(self, options: list[str], extension: str = '.ll') -> None:
+    self.options: list[str] = options
+    self.extension: str = extension
+
+  def to_dict(self) -> dict:
+    return {
+      'options': self.options,
+      'extension': self.extension,
+    }
+
+  @staticmethod
+  def from_dict(data: dict) -> IrStage:
+    return IrStage(
+      options = (data.get('options') or []),
+      extension = (data.get('extension') or '.ll'),
+    )
+
+class Results:
+  def __init__(self, records: list[dict]) -> None:
+    self.records: list[dict] = records
+    self.tests: dict[str, list[dict]] = {}
+    for record in records:
+      self.tests.setdefault(record['test'], []).append(record)
+
+  @staticmethod
+  def outcome(records: list[dict]) -> Outcome:
+    for record in records:
+      if not Outcome(record['outcome']):
+        return Outcome(record['outcome'])
+    return Outcome.PASS
+
+  def failures(self) -> list[str]:
+    return [key for (key, records) in self.tests.items() if not Results.outcome(records)]
+
+  def to_dict(self) -> dict:
+    tests = []
+    for key, records in self.tests.items():
+      kind, name = key.split('/', 1)
+      tests.append({
+        'test': key,
+        'kind': kind,
+        'name': name,
+        'outcome': Results.outcome(records).value,
+        'duration': sum([record['duration'] for record in records]),
+        'phases': records,
+      })
+    return {
+      'timestamp': time.time(),
+      'tests': tests,
+      'summary': {
+        'tests': len(self.tests),
+        'failures': len(self.failures()),
+        'duration': sum([record['duration'] for record in self.records]),
+      },
+    }
+
+  def write_json(self, path: str) -> None:
+    with open(path, 'w') as file:
+      json.dump(self.to_dict(), file, indent=2)
+
+  def write_junit(self, path: str) -> None:
+    import xml.etree.ElementTree
+    suites = xml.etree.ElementTree.Element('testsuites', name='lart-tests')
+    kinds: dict[str, xml.etree.ElementTree.Element] = {}
+    for key, records in self.tests.items():
+      kind, name = key.split('/', 1)
+      if kind not in kinds:
+        kinds[kind] = xml.etree.ElementTree.SubElement(suites, 'testsuite', name=kind)
+      case = xml.etree.ElementTree.SubElement(kinds[kind], 'testcase', classname=kind, name=name, time='%.6f' % sum([record['duration'] for record in records]))
+      outcome = Results.outcome(records)
+      if not outcome:
+        failed = [record for record in records if not Outcome(record['outcome'])][0]
+        failure = xml.etree.ElementTree.SubElement(case, 'failure' if failed['phase'] == 'COMPARE' or kind == TestKind.FAIL.value else 'error',
+          message='%s %s' % (failed['phase'], failed['outcome']), type=failed['outcome'])
+        failure.text = failed.get('message') or ''
+      output = xml.etree.ElementTree.SubElement(case, 'system-out')
+      output.text = '\n'.join(['%s %s %.6fs returncode=%s' % (record['phase'], record['outcome'], record['duration'], record['returncode']) for record in records])
+    for kind, suite in kinds.items():
+      cases = [case for case in suite]
+      suite.set('tests', str(len(cases)))
+      suite.set('failures', str(len([case for case in cases if case.find('failure') is not None])))
+      suite.set('errors', str(len([case for case in cases if case.find('error') is not None])))
+      suite.set('time', '%.6f' % sum([float(case.get('time')) for case in cases]))
+    xml.etree.ElementTree.ElementTree(suites).write(path, encoding='utf-8', xml_declaration=True)
+
+class Watcher:
+  def __init__(self, paths: list[str], interval: float = 0.5, debounce: float = 0.3) -> None:
+    self.paths: list[str] = paths
+    self.interval: float = interval
+    self.debounce: float = debounce
+    self.snapshot: dict[str, tuple[int, int]] = self.scan()
+
+  @staticmethod
+  def create(paths: list[str], debounce: float = 0.3) -> Watcher:
+    try:
+      return InotifyWatcher(paths, debounce=debounce)
+    except (OSError, AttributeError):
+      return Watcher(paths, debounce=debounce)
+
+  def scan(self) -> dict[str, tuple[int, int]]:
+    snapshot: dict[str, tuple[int, int]] = {}
+    for path in self.paths:
+      if os.path.isdir(path):
+        for directory, _, files in os.walk(path):
+          for file in files:
+            try:
+              stat = os.stat(os.path.join(directory, file))
+            except FileNotFoundError:
+              continue
+            snapshot[os.path.join(directory, file)] = (stat.st_mtime_ns, stat.st_size)
+      elif os.path.exists(path):
+        stat = os.stat(path)
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+  def poll(self, timeout: float) -> set[str]:
+    deadline = time.monotonic() + timeout
+    while True:
+      snapshot = self.scan()
+      changed = {path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)}
+      self.snapshot = snapshot
+      remaining = deadline - time.monotonic()
+      if len(changed) > 0 or remaining <= 0:
+        return changed
+      time.sleep(min(self.interval, remaining))
+
+  def wait(self, timeout: float) -> set[str]:
+    changed = self.poll(timeout)
+    while len(changed) > 0:
+      burst = self.poll(self.debounce)
+      if len(burst) == 0:
+        break
+      changed |= burst
+    return changed
+
+  def close(self) -> None:
+    pass
+
+class InotifyWatcher(Watcher):
+  EVENT = struct.Struct('iIII')
+  IN_MODIFY = 0x002
+  IN_ATTRIB = 0x004
+  IN_CLOSE_WRITE = 0x008
+  IN_MOVED_FROM = 0x040
+  IN_MOVED_TO = 0x080
+  IN_CREATE = 0x100
+  IN_DELETE = 0x200
+  IN_DELETE_SELF = 0x400
+  IN_ISDIR = 0x40000000
+  IN_NONBLOCK = 0o4000
+  IN_CLOEXEC = 0o2000000
+  MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+  def __init__(self, paths: list[str], interval: float = 0.5, debounce: float = 0.3) -> None:
+    self.paths: list[str] = paths
+    self.interval: float = interval
+    self.debounce: float = debounce
+    import ctypes
+    import ctypes.util
+    self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    self.fd: int = self.libc.inotify_init1(InotifyWatcher.IN_NONBLOCK | InotifyWatcher.IN_CLOEXEC)
+    if self.fd < 0:
+      raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+    self.directories: dict[int, str] = {}
+    self.files: dict[str, set[str]] = {}
+    for path in paths:
+      if os.path.isdir(path):
+        for directory, _, _ in os.walk(path):
+          self.add(directory)
+      elif os.path.exists(path):
+        directory, name = os.path.split(path)
+        self.files.setdefault(directory or '.', set()).add(name)
+        self.add(directory or '.')
+
+  def add(self, directory: str) -> None:
+    import ctypes
+    if directory in self.directories.values():
+      return
+    wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), InotifyWatcher.MASK)
+    if wd < 0:
+      raise OSError(ctypes.get_errno(), '%s: %s' % (directory, os.strerror(ctypes.get_errno())))
+    self.directories[wd] = directory
+
+  def watched(self, directory: str) -> bool:
+    return any([directory == path or directory.startswith(path.rstrip(os.sep) + os.sep) for path in self.paths if os.path.isdir(path)])
+
+  def poll(self, timeout: float) -> set[str]:
+    changed: set[str] = set()
+    readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+    if len(readable) == 0:
+      return changed
+    try:
+      buffer = os.read(self.fd, 1 << 16)
+    except BlockingIOError:
+      return changed
+    offset = 0
+    while offset < len(buffer):
+      wd, mask, _, length = InotifyWatcher.EVENT.unpack_from(buffer, offset)
+      offset += InotifyWatcher.EVENT.size
+      name = os.fsdecode(buffer[offset:offset + length].rstrip(b'\0'))
+      offset += length
+      directory = self.directories.get(wd)
+      if directory is None:
+        continue
+      if mask & InotifyWatcher.IN_DELETE_SELF:
+        del self.directories[wd]
+        continue
+      if directory in self.files and not self.watched(directory):
+        if name in self.files[directory]:
+          changed.add(os.path.join(directory, name))
+        continue
+      path = os.path.join(directory, name)
+      if mask & InotifyWatcher.IN_ISDIR:
+        if mask & (InotifyWatcher.IN_CREATE | InotifyWatcher.IN_MOVED_TO):
+          for subdirectory, _, files in os.walk(path):
+            self.add(subdirectory)
+            changed |= {os.path.join(subdirectory, file) for file in files}
+        continue
+      changed.add(path)
+    return changed
+
+  def close(self) -> None:
+    os.close(self.fd)
+
+class Framework:
+  def __init__(self, cc: Compiler, lartc: Compiler, test_dir: str, cache: BuildCache|None = None, limits: dict[str, Limits]|None = None, sentinels: list[str]|None = None, ir: IrStage|None = None) -> None:
+    self.cc = cc
+    self.lartc =lartc 
+    self.test_dir: str = test_dir
+    self.cache: BuildCache = cache or BuildCache('.lart-cache', 1 << 30)
+    self.limits: dict[str, Limits] = (limits or {})
+    self.sentinels: list[str] = (sentinels or [])
+    self.ir: IrStage = (ir or IrStage(['-S', '-emit-llvm']))
+    self.includes: IncludeGraph = IncludeGraph(os.path.join(test_dir, 'includes.yml'), lartc.include_directories, {})
+    self.tests: dict[TestKind, TestTable] = {}
+    self.dirty: bool = False
+    self.verbose: bool = False
+    self.jobs: int = 1
+    self.reduce_jobs: int = 1
+    self.fused: bool = True
+    self.repeat: int = 10
+    self.warmup: int = 2
+    self.update_baseline: bool = False
+    self.max_exponent: float = 1.3
+    self.size_threshold: float = 0.01
+    self.profile: CompileProfile = CompileProfile()
+    self.profile_repeat: int = 0
+    self.history: History|None = None
+    self.selection: set[str]|None = None
+    self.cancelled = threading.Event()
+    self.shard: tuple[int, int]|None = None
+    self.build_dir: str|None = None
+    self.building: dict[str, threading.Event] = {}
+    self.building_lock = threading.Lock()
+    self.assigned: set[str] = set()
+    self.helpers: dict[str, str] = {}
+    self.helpers_lock = threading.Lock()
+
+  def to_dict(self) -> dict:
+    return {
+      'cc': self.cc.to_dict(),
+      'lartc': self.lartc.to_dict(),
+      'test_dir': self.test_dir,
+      'cache': self.cache.to_dict(),
+      'limits': {phase: limits.to_dict() for (phase, limits) in self.limits.items()},
+      'sentinels': self.sentinels,
+      'ir': self.ir.to_dict(),
+    }
+
+  @staticmethod
+  def from_dict(data: dict) -> Framework:
+    return Framework(
+      cc = Compiler.from_dict(data['cc']),
+      lartc = Compiler.from_dict(data['lartc']),
+      test_dir = data['test_dir'],
+      cache = (BuildCache.from_dict(data['cache']) if 'cache' in data else None),
+      limits = {phase: Limits.from_dict(limits) for (phase, limits) in (data.get('limits') or {}).items()},
+      sentinels = data.get('sentinels'),
+      ir = (IrStage.from_dict(data['ir']) if 'ir' in data else None),
+    )
+
+  @staticmethod
+  def load_from_config(config_file: str) -> Framework:
+    if os.path.exists(config_file):
+      return Framework.from_dict(read_yaml(config_file))
+    else:
+      framework = Framework(
+        cc = Compiler('./cc', [], ['-c']),
+        lartc = Compiler('./lartc', ['include'], []),
+        test_dir = 'tests'
+      )
+      write_yaml(config_file, framework.to_dict())
+      return framework
+
+  @staticmethod
+  def discover_tests(path: str) -> dict[TestKind, TestTable]:
+    tests: dict[TestKind, TestTable] = {}
+    with os.scandir(path) as kinddirs:
+      for kinddir in kinddirs:
+        if kinddir.is_dir():
+          with os.scandir(kinddir.path) as namedirs:
+            for namedir in namedirs:
+              if namedir.is_dir():
+                test = Test.discover(namedir.path)
+                if test.kind not in tests:
+                  tests[test.kind] = TestTable()
+                tests[test.kind][test.name] = test
+    return tests
+
+  @staticmethod
+  def manifest_path(test_config: str) -> str:
+    return os.path.join(os.path.dirname(test_config), '.config.pickle')
+
+  @staticmethod
+  def write_manifest(test_config: str, content: bytes, data: dict) -> None:
+    manifest = Framework.manifest_path(test_config)
+    staging = '%s.%d' % (manifest, os.getpid())
+    with open(staging, 'wb') as file:
+      pickle.dump({'digest': hashlib.sha256(content).hexdigest(), 'tests': data}, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(staging, manifest)
+
+  @staticmethod
+  def write_tests(tests: dict[TestKind, TestTable], test_config: str):
+    data = {key.value:value.to_dicts() for (key, value) in tests.items()}
+    write_yaml(test_config, data)
+    with open(test_config, 'rb') as file:
+      Framework.write_manifest(test_config, file.read(), data)
+
+  @staticmethod
+  def read_tests(test_config: str) -> dict[TestKind, TestTable]:
+      with open(test_config, 'rb') as file:
+        content = file.read()
+      data = None
+      manifest = Framework.manifest_path(test_config)
+      if os.path.exists(manifest):
+        try:
+          with open(manifest, 'rb') as file:
+            cached = pickle.load(file)
+          if cached['digest'] == hashlib.sha256(content).hexdigest():
+            data = cached['tests']
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+          data = None
+      if data is None:
+        data = yaml.load(content, Loader=YAML_LOADER) or {}
+        Framework.write_manifest(test_config, content, data)
+
+      result: dict[TestKind, TestTable] = {}
+      for kind, tests in data.items():
+        result[TestKind.parse(kind)] = TestTable({test['name']: test for test in tests})
+      return result
+
+  @staticmethod
+  def load_tests(test_dir: str) -> dict[TestKind, TestTable]:
+    if not os.path.exists(test_dir):
+      raise ValueError('Cannot load Framework as the test directory `%s` doesn\'t exist' % test_dir)
+    if not os.path.isdir(test_dir):
+      raise ValueError('Cannot load Framework as the test directory `%s` isn\'t a directory' % test_dir)
+
+    test_config = os.path.join(test_dir, 'config.yml')
+    if not os.path.exists(test_config):
+      tests = Framework.discover_tests(test_dir)
+      Framework.write_tests(tests, test_config)
+      return tests
+    else:
+      return Framework.read_tests(test_config)
+
+  def restore(self):
+    self.tests = Framework.load_tests(self.test_dir)
+    self.includes = IncludeGraph.load(os.path.join(self.test_dir, 'includes.yml'), self.lartc.include_directories)
+
+  def save(self):
+    if self.dirty:
+      test_config = os.path.join(self.test_dir, 'config.yml')
+      Framework.write_tests(self.tests, test_config)
+      self.dirty = False
+    self.includes.save()
+
+  def get_targets(self, raw_targets: list[str]) -> list[Test]:
+    targets: list[Test] = []
+    kinds: dict[TestKind, list[str]] = {}
+    for raw_target in raw_targets:
+      pieces = raw_target.split('/')
+      if len(pieces) != 2:
+        raise ValueError('Invalid target supplied: `%s` is not in format <kind>/<name>' % (raw_target,))
+      kind, name = pieces
+      if kind not in TestKind.values():
+        raise ValueError('Invalid test kind in target supplied: `%s` is not a valid TestKind' % (kind,))
+      kind = TestKind.parse(kind)
+      if kind not in kinds:
+        kinds[kind] = []
+      if name not in kinds[kind]:
+        kinds[kind].append(name)
+
+    for kind in kinds.keys():
+      names = kinds[kind]
+      tests_of_that_kind = self.tests.get(kind) or TestTable()
+      missing_names = [name for name in names if name not in tests_of_that_kind]
+      if len(missing_names) > 0:
+        raise ValueError('Invalid test names supplied: %s are not valid test names within kind `%s`' % (missing_names, kind))
+      targets += [tests_of_that_kind[name] for name in names]
+    return targets
+
+  def select(self, raw_targets: list[str], kinds: list[TestKind]) -> list[Test]:
+    targets: list[Test] = []
+    if len(raw_targets) == 0:
+      for kind in kinds:
+        targets += list((self.tests.get(kind) or {}).values())
+    else:
+      targets = self.get_targets(raw_targets)
+    if self.selection is not None:
+      targets = [test for test in targets if '%s/%s' % (test.kind.value, test.name) in self.selection]
+    if self.shard is not None:
+      targets = self.partition(targets)[self.shard[0] - 1]
+      self.assigned |= {'%s/%s' % (test.kind.value, test.name) for test in targets}
+    return targets
+
+  def weights(self, targets: list[Test]) -> dict[str, float]:
+    sizes = {'%s/%s' % (test.kind.value, test.name): float(test.source_size()) for test in targets}
+    durations_path = os.path.join(self.test_dir, 'durations.yml')
+    durations: dict[str, float] = (read_yaml(durations_path) or {}) if os.path.exists(durations_path) else {}
+    expected = {key: durations[key] for key in sizes.keys() if key in durations}
+    if len(expected) == 0:
+      return sizes
+    rates = [expected[key] / sizes[key] for key in expected.keys() if sizes[key] > 0]
+    rate = statistics.median(rates) if len(rates) > 0 else statistics.median(expected.values())
+    return {key: expected.get(key, size * rate) for (key, size) in sizes.items()}
+
+  def partition(self, targets: list[Test]) -> list[list[Test]]:
+    count = self.shard[1] if self.shard is not None else 1
+    weights = self.weights(targets)
+    loads = [0.0] * count
+    assignment: dict[str, int] = {}
+    for key in sorted(weights.keys(), key=lambda key: (-weights[key], key)):
+      shard = min(range(count), key=lambda shard: (loads[shard], shard))
+      assignment[key] = shard
+      loads[shard] += weights[key]
+    shards: list[list[Test]] = [[] for _ in range(count)]
+    for test in targets:
+      shards[assignment['%s/%s' % (test.kind.value, test.name)]].append(test)
+    return shards
+
+  def changed_since(self, revision: str) -> list[str]:
+    paths: list[str] = []
+    for arguments in [['diff', '--name-only', '--relative', revision, '--'], ['ls-files', '--others', '--exclude-standard']]:
+      chunks: list[bytes] = []
+      cmd = CMD('git')
+      cmd.append(arguments)
+      result = cmd.exec(self.verbose, lambda chunk: chunks.append(chunk) is None)
+      if not result.ok:
+        raise ValueError('Cannot list the files changed since `%s`: `git %s` exited with %d' % (revision, arguments[0], result.returncode))
+      paths += b''.join(chunks).decode().splitlines()
+    return paths
+
+  def affected(self, paths: list[str]) -> set[str]:
+    normalize = lambda path: os.path.relpath(os.path.abspath(path))
+    changed = {normalize(path) for path in paths}
+    tests = [test for kind in TestKind.enums() for test in (self.tests.get(kind) or {}).values()]
+    keys = {'%s/%s' % (test.kind.value, test.name) for test in tests}
+
+    configs = {normalize('config.yml'), normalize(os.path.join(self.test_dir, 'config.yml'))}
+    if len(changed & configs) > 0 or normalize(shutil.which(self.lartc.path) or self.lartc.path) in changed:
+      return keys
+
+    cc_changed = normalize(shutil.which(self.cc.path) or self.cc.path) in changed
+    for include_directory in self.cc.include_directories:
+      prefix = normalize(include_directory) + os.sep
+      cc_changed |= any([path.startswith(prefix) for path in changed])
+    basenames = {os.path.basename(path) for path in changed}
+
+    affected: set[str] = set()
+    for test in tests:
+      key = '%s/%s' % (test.kind.value, test.name)
+      prefix = normalize(test.path) + os.sep
+      sources = [normalize(os.path.join(test.path, source)) for source in test.sources]
+      dependencies = set(sources)
+      dependencies |= {normalize(os.path.join(test.path, file)) for file in test.inputs + [test.reference]}
+      dependencies |= {normalize(arg) for arg in test.args}
+      for source in sources:
+        if source.endswith('.lart') and os.path.exists(source):
+          dependencies |= set(self.includes.closure(source))
+      libraries = {'lib%s.%s' % (link, extension) for link in test.links for extension in ['so', 'a']}
+      if len(dependencies & changed) > 0 or len(libraries & basenames) > 0 or any([path.startswith(prefix) for path in changed]):
+        affected.add(key)
+      elif cc_changed and any([source.endswith('.c') for source in sources]):
+        affected.add(key)
+    return affected
+
+  def namespace(self) -> str:
+    return BuildCache.key(self.cc.fingerprint(), self.lartc.fingerprint())[:16]
+
+  def support_dir(self) -> str:
+    return os.path.join(self.build_dir or '.lart-build', self.namespace())
+
+  def build_helper(self, name: str, artifact: str, code: str, options: list[str], limits: Limits|None) -> tuple[Outcome, str]:
+    directory = os.path.join(self.support_dir(), name)
+    source = os.path.join(directory, name + '.c')
+    output = os.path.abspath(os.path.join(directory, artifact))
+    complaint = os.path.join(directory, name + '.com')
+    os.makedirs(directory, exist_ok=True)
+    key = BuildCache.key(name, self.cc.fingerprint(), code)
+    if self.cache.restore(key, [output, complaint]):
+      return (Outcome.PASS, output)
+    with open(source, 'w') as file:
+      file.write(code)
+    if os.path.lexists(output):
+      os.remove(output)
+    cmd = CMD(self.cc.path)
+    cmd.append([option for option in self.cc.options if option != '-c'])
+    cmd.append(options + ['-o', output, source])
+    cmd.stdout = complaint
+    cmd.stderr = complaint
+    cmd.limits = limits
+    result = cmd.exec(self.verbose)
+    if not result.ok:
+      return (result.outcome, output)
+    self.cache.store(key, [output, complaint])
+    return (Outcome.PASS, output)
+
+  def build_shim(self) -> tuple[Outcome, str]:
+    return self.build_helper('memprofile', 'libmemprofile.so', MEMPROFILE_SHIM, ['-shared', '-fPIC', '-O2'], self.limits.get('build'))
+
+  def launcher(self, oom: bool) -> tuple[str, str|None]:
+    limits = Limits(timeout=(self.limits.get('build') or Limits()).timeout)
+    with self.helpers_lock:
+      if 'launcher' not in self.helpers:
+        outcome, launcher = self.build_helper('launcher', 'launcher', LAUNCHER, ['-O2'], limits)
+        if not outcome:
+          raise ValueError('Cannot build the process launcher `%s`: %s' % (launcher, tail_excerpt(os.path.join(os.path.dirname(launcher), 'launcher.com'))))
+        self.helpers['launcher'] = launcher
+      if oom and 'oom' not in self.helpers:
+        outcome, oom_shim = self.build_helper('oom', 'liboom.so', OOM_SHIM, ['-shared', '-fPIC', '-O2'], limits)
+        if not outcome:
+          raise ValueError('Cannot build the allocation failure detector `%s`: %s' % (oom_shim, tail_excerpt(os.path.join(os.path.dirname(oom_shim), 'oom.com'))))
+        self.helpers['oom'] = oom_shim
+      return (self.helpers['launcher'], self.helpers.get('oom') if oom else None)
+
+  def limits_for(self, test: Test, phase: str) -> Limits:
+    return (self.limits.get(phase) or Limits()).merge(test.limits.get(phase))
+
+  def schedule(self, targets: list[Test], task: Callable[[Test], bool|Outcome|None]) -> list[bool|Outcome|None]:
+    if self.history is not None:
+      targets = self.history.prioritize(targets)
+
+    def guarded(test: Test) -> bool|Outcome|None:
+      if self.cancelled.is_set():
+        return None
+      return task(test)
+    if self.jobs <= 1 or len(targets) <= 1:
+      return [guarded(test) for test in targets]
+    import concurrent.futures
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs)
+    try:
+      return list(executor.map(guarded, targets))
+    finally:
+      executor.shutdown(wait=True, cancel_futures=True)
+
+  def clean(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.FAIL, TestKind.SUCC, TestKind.DIFF, TestKind.PERF])
+
+    def task(test: Test) -> None:
+      test.begin(self, 'CLEAN')
+      test.clean(self)
+      test.end('CLEAN', True)
+    self.schedule(targets, task)
+
+  def build(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.SUCC, TestKind.DIFF])
+
+    def task(test: Test) -> Outcome:
+      test.begin(self, 'BUILD')
+      esit = test.build(self)
+      test.end('BUILD', esit)
+      return esit
+    self.schedule(targets, task)
+
+  def run(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.SUCC, TestKind.DIFF])
+
+    def task(test: Test) -> Outcome:
+      test.begin(self, 'RUN')
+      esit = test.run(self)
+      test.end('RUN', esit)
+      return esit
+    self.schedule(targets, task)
+
+  def consolidate(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.DIFF])
+
+    def task(test: Test) -> bool:
+      test.begin(self, 'CONSOLIDATE')
+      esit = test.consolidate(self)
+      test.end('CONSOLIDATE', esit)
+      return esit
+    self.schedule(targets, task)
+
+  def compare(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.DIFF])
+
+    def task(test: Test) -> bool:
+      test.begin(self, 'COMPARE')
+      esit = test.compare(self)
+      test.end('COMPARE', esit)
+      return esit
+    self.schedule(targets, task)
+
+  def detect(self, raw_targets: list[str]):
+    for raw_target in raw_targets:
+      pieces = raw_target.split('/')
+      if len(pieces) != 2:
+        raise ValueError('Invalid target supplied: `%s` is not in format <kind>/<name>' % (raw_target,))
+      kind, name = pieces
+      if kind not in TestKind.values():
+        raise ValueError('Invalid test kind in target supplied: `%s` is not a valid TestKind' % (kind,))
+
+      if TestKind.parse(kind) not in self.tests:
+        self.tests[TestKind.parse(kind)] = TestTable()
+      if name in self.tests[TestKind.parse(kind)]:
+        raise ValueError('Test already discovered and in config: `%s/%s`' % (kind, name))
+      namepath = os.path.join(self.test_dir, kind, name)
+      test = Test.discover(namepath)
+      self.tests[test.kind][test.name] = test
+      self.dirty = True
+    self.save()
+
+  def report(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.SUCC, TestKind.DIFF, TestKind.FAIL])
+
+    def task(test: Test) -> Outcome:
+      esit = Outcome.PASS
+      test.begin(self, 'BUILD')
+      if test.kind == TestKind.FAIL:
+        esit = test.build(self).inverted()
+        if not esit:
+          test.note('the build succeeded but the test expects it to fail')
+      elif test.kind in [TestKind.SUCC, TestKind.DIFF]:
+        esit = test.build(self)
+      test.end('BUILD', esit)
+      if not esit:
+        return esit
+
+      if test.kind == TestKind.DIFF and self.fused:
+        test.begin(self, 'RUN')
+        esit, matches = test.run_and_compare(self)
+        messages = test.phase_messages
+        test.end('RUN', esit)
+        if not esit:
+          return esit
+        esit = Outcome.of(matches)
+        test.begin(self, 'COMPARE')
+        test.phase_messages = messages
+        test.end('COMPARE', esit)
+        return esit
+
+      if test.kind in [TestKind.SUCC, TestKind.DIFF]:
+        test.begin(self, 'RUN')
+        esit = test.run(self)
+        test.end('RUN', esit)
+      if not esit:
+        return esit
+
+      if test.kind == TestKind.DIFF:
+        test.begin(self, 'COMPARE')
+        esit = Outcome.of(test.compare(self))
+        test.end('COMPARE', esit)
+      return esit
+    self.schedule(targets, task)
+
+  def bench(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.DIFF])
+
+    baseline_path = os.path.join(self.test_dir, 'bench.yml')
+    baselines: dict[str, dict] = (read_yaml(baseline_path) or {}) if os.path.exists(baseline_path) else {}
+    rows: list[tuple[Test, Benchmark, Benchmark|None]] = []
+    for test in targets:
+      test.begin(self, 'BENCH')
+      outcome, benchmark = test.bench(self)
+      if benchmark is not None:
+        key = '%s/%s' % (test.kind.value, test.name)
+        baseline = Benchmark.from_dict(baselines[key]) if key in baselines else None
+        if baseline is not None and len(benchmark.regressions(baseline)) > 0:
+          outcome = Outcome.SLOW
+        if baseline is None or self.update_baseline:
+          baselines[key] = benchmark.to_dict()
+        rows.append((test, benchmark, baseline))
+      test.end('BENCH', outcome)
+    write_yaml(baseline_path, baselines)
+
+    print('| %s | %s | %s | %s | %s | %s |' % ('KIND'.ljust(6), 'NAME'.ljust(40), 'WALL (ms)'.rjust(18), 'CPU (ms)'.rjust(18), 'MAXRSS (KiB)'.rjust(12), 'DELTA'.rjust(8)))
+    for test, benchmark, baseline in rows:
+      delta = ''
+      if baseline is not None:
+        delta = '%+.1f%%' % (100 * (benchmark.median('wall') / max(baseline.median('wall'), 1e-9) - 1))
+      print('| %s | %s | %s | %s | %s | %s |' % (
+        test.kind.name.ljust(6),
+        test.name.ljust(40),
+        ('%.3f ± %.3f' % (1000 * benchmark.median('wall'), 1000 * benchmark.mad('wall'))).rjust(18),
+        ('%.3f ± %.3f' % (1000 * benchmark.median('cpu'), 1000 * benchmark.mad('cpu'))).rjust(18),
+        ('%d' % (benchmark.median('maxrss') / 1024,)).rjust(12),
+        delta.rjust(8),
+      ))
+
+  def perf(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.PERF])
+
+    curves_path = os.path.join(self.test_dir, 'perf.yml')
+    curves: dict[str, dict] = (read_yaml(curves_path) or {}) if os.path.exists(curves_path) else {}
+    rows: list[tuple[Test, dict]] = []
+    for test in targets:
+      test.begin(self, 'PERF')
+      outcome, curve = test.perf(self)
+      if curve is not None:
+        curves['%s/%s' % (test.kind.value, test.name)] = {'shape': test.scale.shape, 'timestamp': time.time(), **curve}
+        rows.append((test, curve))
+      test.end('PERF', outcome)
+    write_yaml(curves_path, curves)
+
+    print('| %s | %s | %s | %s | %s |' % ('NAME'.ljust(40), 'SIZE'.rjust(8), 'LINES'.rjust(8), 'WALL (ms)'.rjust(12), 'MAXRSS (KiB)'.rjust(12)))
+    for test, curve in rows:
+      for size, lines, wall, maxrss in zip(curve['sizes'], curve['lines'], curve['wall'], curve['maxrss']):
+        print('| %s | %s | %s | %s | %s |' % (test.name.ljust(40), ('%d' % (size,)).rjust(8), ('%d' % (lines,)).rjust(8), ('%.3f' % (1000 * wall,)).rjust(12), ('%d' % (maxrss / 1024,)).rjust(12)))
+      print('%s: time ~ size^%.2f, memory ~ size^%.2f' % (test.name, curve['exponents']['wall'], curve['exponents']['maxrss']))
+
+  def measure(self, test: Test) -> tuple[Outcome, Benchmark|None]:
+    outcome = test.build(self)
+    if not outcome:
+      return (outcome, None)
+    repeat = max(self.profile_repeat, 1)
+    units = len(test.phase_results) // repeat
+    compiles = [sum([test.phase_results[unit * repeat + sample].wall for unit in range(units)]) for sample in range(repeat)]
+    size = os.path.getsize(test.artifact(self, test.program))
+
+    outcome, matches = test.run_and_compare(self)
+    if not outcome:
+      return (outcome, None)
+    if not matches:
+      return (Outcome.ERROR, None)
+    outcome, benchmark = test.bench(self)
+    if benchmark is None:
+      return (outcome, None)
+    benchmark.samples['compile'] = compiles
+    benchmark.samples['size'] = [float(size)]
+    return (Outcome.PASS, benchmark)
+
+  def compare_compiler(self, raw_targets: list[str], path: str):
+    targets = self.select(raw_targets, [TestKind.DIFF])
+
+    root = self.build_dir or '.lart-compare'
+    sides: list[Framework] = []
+    for side, lartc in [('a', self.lartc), ('b', Compiler.from_dict(read_yaml(path)))]:
+      framework = Framework(self.cc, lartc, self.test_dir, self.cache, self.limits)
+      framework.includes = IncludeGraph(os.path.join(root, side, 'includes.yml'), lartc.include_directories, {})
+      framework.build_dir = os.path.join(root, side)
+      framework.verbose = self.verbose
+      framework.repeat = self.repeat
+      framework.warmup = self.warmup
+      framework.profile_repeat = max(self.profile_repeat, self.repeat)
+      sides.append(framework)
+
+    rows: list[tuple[Test, Benchmark, Benchmark]] = []
+    import concurrent.futures
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(sides))
+    try:
+      for test in targets:
+        test.begin(self, 'A/B')
+        copies = [Test.from_dict(test.to_dict()) for _ in sides]
+        measures = list(executor.map(lambda side, copy: side.measure(copy), sides, copies))
+        outcome = Outcome.PASS
+        for label, side, copy, (side_outcome, _) in zip(['a', 'b'], sides, copies, measures):
+          if not side_outcome:
+            test.note('%s (%s): %s\n%s' % (label, side.lartc.path, side_outcome.value, '\n'.join(copy.phase_messages)))
+            outcome = side_outcome
+        if outcome:
+          rows.append((test, measures[0][1], measures[1][1]))
+        test.end('A/B', outcome)
+    finally:
+      executor.shutdown(wait=True, cancel_futures=True)
+
+    cell = lambda delta: '%+.1f%% [%+.1f, %+.1f]' % (100 * delta[0], 100 * delta[1], 100 * delta[2])
+    print('%s -> %s' % (self.lartc.path, sides[1].lartc.path))
+    print('| %s | %s | %s | %s | %s |' % ('NAME'.ljust(40), 'COMPILE'.rjust(24), 'SIZE'.rjust(8), 'RUNTIME'.rjust(24), 'MAXRSS'.rjust(24)))
+    for test, before, after in rows:
+      print('| %s | %s | %s | %s | %s |' % (
+        test.name.ljust(40),
+        cell(after.delta(before, 'compile')).rjust(24),
+        ('%+.1f%%' % (100 * after.delta(before, 'size')[0],)).rjust(8),
+        cell(after.delta(before, 'wall')).rjust(24),
+        cell(after.delta(before, 'maxrss')).rjust(24),
+      ))
+
+  def memprofile(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.DIFF])
+
+    outcome, shim = self.build_shim()
+    if not outcome:
+      raise ValueError('Cannot build the allocation profiler `%s`: %s' % (shim, tail_excerpt(os.path.join(os.path.dirname(shim), 'memprofile.com'))))
+    baseline_path = os.path.join(self.test_dir, 'memprofile.yml')
+    baselines: dict[str, dict] = (read_yaml(baseline_path) or {}) if os.path.exists(baseline_path) else {}
+    metrics = ['allocations', 'bytes', 'peak', 'leaked_blocks', 'leaked_bytes']
+
+    def task(test: Test) -> tuple[Test, dict|None]:
+      test.begin(self, 'MEMPROFILE')
+      outcome = test.build(self)
+      profile = None
+      if outcome:
+        outcome, profile = test.memprofile(self, shim)
+      if profile is not None:
+        key = '%s/%s' % (test.kind.value, test.name)
+        baseline = baselines.get(key)
+        if baseline is not None:
+          grown = [metric for metric in metrics if profile[metric] > baseline[metric] * 1.05]
+          if len(grown) > 0:
+            test.note('heap usage grew in %s' % (', '.join(grown),))
+            outcome = Outcome.LARGE
+        if baseline is None or self.update_baseline:
+          baselines[key] = profile
+      test.end('MEMPROFILE', outcome)
+      return (test, profile)
+    rows = self.schedule(targets, task)
+    write_yaml(baseline_path, baselines)
+
+    print('| %s | %s | %s | %s | %s | %s |' % ('NAME'.ljust(32), 'ALLOCS'.rjust(10), 'BYTES'.rjust(12), 'PEAK'.rjust(12), 'LEAKED'.rjust(16), 'VS BASELINE'.rjust(12)))
+    for row in rows:
+      if row is None or row[1] is None:
+        continue
+      test, profile = row
+      baseline = baselines['%s/%s' % (test.kind.value, test.name)]
+      delta = '%+d allocs' % (profile['allocations'] - baseline['allocations'],) if profile['allocations'] != baseline['allocations'] else ''
+      print('| %s | %s | %s | %s | %s | %s |' % (
+        test.name.ljust(32),
+        ('%d' % (profile['allocations'],)).rjust(10),
+        ('%d' % (profile['bytes'],)).rjust(12),
+        ('%d' % (profile['peak'],)).rjust(12),
+        ('%d in %d' % (profile['leaked_bytes'], profile['leaked_blocks'])).rjust(16),
+        delta.rjust(12),
+      ))
+
+  def ir_report(self, raw_targets: list[str], threshold: float = 0.25):
+    targets = self.select(raw_targets, [TestKind.SUCC, TestKind.DIFF])
+
+    metrics_path = os.path.join(self.test_dir, 'ir.yml')
+    recorded: dict[str, dict] = (read_yaml(metrics_path) or {}) if os.path.exists(metrics_path) else {}
+    fingerprint = self.namespace()
+    columns = ['instructions', 'blocks', 'allocas', 'loads', 'stores', 'calls', 'frame']
+
+    def task(test: Test) -> tuple[Test, dict[str, dict]]:
+      test.begin(self, 'IR')
+      outcome, functions = test.ir_metrics(self)
+      test.end('IR', outcome)
+      return (test, functions if outcome else {})
+    rows = [row for row in self.schedule(targets, task) if row is not None]
+
+    print('| %s | %s |' % ('FUNCTION'.ljust(48), ' | '.join([column.upper().rjust(12) for column in columns])))
+    for test, functions in rows:
+      if len(functions) == 0:
+        continue
+      key = '%s/%s' % (test.kind.value, test.name)
+      builds = recorded.setdefault(key, {})
+      previous = max([build for (other, build) in builds.items() if other != fingerprint], key=lambda build: build['timestamp'], default=None)
+      builds[fingerprint] = {'timestamp': time.time(), 'functions': functions}
+      for function, metrics in functions.items():
+        before = previous['functions'].get(function) if previous is not None else None
+        cells = []
+        for column in columns:
+          cell = '%d' % (metrics[column],)
+          if before is not None and metrics[column] != before[column]:
+            cell += ' %+d' % (metrics[column] - before[column],)
+          cell = cell.rjust(12)
+          if before is not None and abs(metrics[column] - before[column]) > max(threshold * before[column], 2):
+            cell = TextColor.RED.value + cell + TextColor.NORMAL.value
+          cells.append(cell)
+        print('| %s | %s |' % (('%s/%s' % (test.name, function))[:48].ljust(48), ' | '.join(cells)))
+    write_yaml(metrics_path, recorded)
+
+  def signature(self, test: Test) -> str:
+    normalize = lambda text: re.sub(r'\d+', '#', text.replace(test.path + os.sep, ''))
+    outcome = test.build(self)
+    if not outcome:
+      lines = '\n'.join(test.phase_messages).splitlines()
+      errors = [line for line in lines[1:] if 'error' in line.lower()] or lines[1:2]
+      return 'BUILD %s %s' % (outcome.value, normalize(errors[0]) if len(errors) > 0 else '')
+    if test.kind == TestKind.DIFF:
+      outcome, matches = test.run_and_compare(self)
+      if not outcome:
+        return 'RUN %s %d' % (outcome.value, test.phase_results[-1].returncode)
+      return 'PASS' if matches else 'COMPARE'
+    if test.kind == TestKind.SUCC:
+      outcome = test.run(self)
+      if not outcome:
+        return 'RUN %s %d' % (outcome.value, test.phase_results[-1].returncode)
+    return 'PASS'
+
+  def reduce(self, raw_targets: list[str], slower: float|None = None):
+    import concurrent.futures
+    targets = self.get_targets(raw_targets)
+
+    for test in targets:
+      test.begin(self, 'REDUCE')
+      files = {}
+      for source in test.sources:
+        with open(os.path.join(test.path, source)) as file:
+          files[source] = file.read()
+      memo: dict[str, str] = {}
+      build, run = self.limits_for(test, 'build'), self.limits_for(test, 'run')
+      helpers = (self.launcher(build.memory is not None or run.memory is not None) if build.restricts() or run.restricts() else None)
+      executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.reduce_jobs)
+      try:
+        def evaluate(candidates: list[dict[str, str]]) -> list[str]:
+          keys = [BuildCache.key(*['%s\0%s' % (name, content) for (name, content) in sorted(candidate.items())]) for candidate in candidates]
+          pending = {key: candidate for (key, candidate) in zip(keys, candidates) if key not in memo}
+          jobs = [(self.to_dict(), test.to_dict(), candidate, slower, helpers) for candidate in pending.values()]
+          for key, signature in zip(pending.keys(), executor.map(reduce_evaluate, jobs)):
+            memo[key] = signature
+          return [memo[key] for key in keys]
+
+        expected = evaluate([files])[0]
+        if expected in ['PASS', 'FAST']:
+          test.note('the test %s, there is nothing to preserve' % ('passes' if expected == 'PASS' else 'compiles within %.1f seconds' % (slower,)))
+          test.end('REDUCE', Outcome.ERROR)
+          continue
+        with CONSOLE_LOCK:
+          print('reducing %s/%s while it keeps failing as: %s' % (test.kind.value, test.name, expected), flush=True)
+        for source in [source for source in test.sources if source.endswith('.lart')]:
+          for split in [split_declarations, lambda content: content.splitlines(keepends=True)]:
+            failing = lambda candidates: [signature == expected for signature in evaluate([{**files, source: ''.join(candidate)} for candidate in candidates])]
+            files[source] = ''.join(ddmin(split(files[source]), failing))
+      finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+      name, index = test.name + '-reduced', 1
+      while os.path.exists(os.path.join(self.test_dir, test.kind.value, name)):
+        index += 1
+        name = '%s-reduced-%d' % (test.name, index)
+      directory = os.path.join(self.test_dir, test.kind.value, name)
+      os.makedirs(directory)
+      for file in test.inputs + test.args + [test.reference]:
+        if os.path.isfile(os.path.join(test.path, file)):
+          shutil.copy(os.path.join(test.path, file), os.path.join(directory, file))
+      for source, content in files.items():
+        with open(os.path.join(directory, source), 'w') as file:
+          file.write(content)
+      self.detect(['%s/%s' % (test.kind.value, name)])
+      for source in test.sources:
+        if source.endswith('.lart'):
+          with open(os.path.join(test.path, source)) as file:
+            before = len(file.read().splitlines())
+          with CONSOLE_LOCK:
+            print('%s: %d -> %d lines in %s (%d candidates evaluated)' % (source, before, len(files[source].splitlines()), directory, len(memo)))
+      test.end('REDUCE', Outcome.PASS)
+
+  def size(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.SUCC, TestKind.DIFF])
+
+    sizes_path = os.path.join(self.test_dir, 'sizes.yml')
+    recorded: dict[str, dict] = (read_yaml(sizes_path) or {}) if os.path.exists(sizes_path) else {}
+    fingerprint = self.namespace()
+    rows: list[tuple[Test, str, dict, dict|None]] = []
+    for test in targets:
+      test.begin(self, 'SIZE')
+      key = '%s/%s' % (test.kind.value, test.name)
+      sizes = test.sizes(self)
+      if len(sizes) == 0:
+        test.note('nothing to measure, build the test first')
+        test.end('SIZE', Outcome.ERROR)
+        continue
+      builds = recorded.setdefault(key, {})
+      previous = max([build for (other, build) in builds.items() if other != fingerprint], key=lambda build: build['timestamp'], default=None)
+      builds[fingerprint] = {'timestamp': time.time(), 'files': sizes}
+
+      outcome = Outcome.PASS
+      for file, size in sizes.items():
+        before = previous['files'].get(file) if previous is not None else None
+        rows.append((test, file, size, before))
+        if before is None:
+          continue
+        grown = [section for section in ElfFile.SECTIONS if size['sections'][section] > before['sections'][section] * (1 + self.size_threshold)]
+        if len(grown) > 0 and key in self.sentinels:
+          test.note('%s grew in %s' % (file, ', '.join(grown)))
+          outcome = Outcome.LARGE
+      test.end('SIZE', outcome)
+    write_yaml(sizes_path, recorded)
+
+    print('| %s | %s | %s | %s | %s | %s |' % ('NAME'.ljust(32), 'FILE'.ljust(16), *[section.lstrip('.').upper().rjust(14) for section in ElfFile.SECTIONS]))
+    for test, file, size, before in rows:
+      cells = []
+      for section in ElfFile.SECTIONS:
+        cell = '%d' % (size['sections'][section],)
+        if before is not None and size['sections'][section] != before['sections'][section]:
+          cell += ' %+d' % (size['sections'][section] - before['sections'][section],)
+        cells.append(cell.rjust(14))
+      print('| %s | %s | %s | %s | %s | %s |' % (test.name.ljust(32), file.ljust(16), *cells))
+      if before is not None:
+        changed = sorted([(size['functions'][function] - before['functions'].get(function, 0), function) for function in size['functions'] if size['functions'][function] != before['functions'].get(function, 0)], reverse=True)
+        for delta, function in changed[:5]:
+          print('|   %s %+d bytes' % (function, delta))
+      elif self.verbose:
+        for function, length in sorted(size['functions'].items(), key=lambda item: -item[1])[:5]:
+          print('|   %s %d bytes' % (function, length))
+
+  def history_trends(self, raw_targets: list[str]):
+    targets = self.select(raw_targets, [TestKind.SUCC, TestKind.DIFF, TestKind.FAIL])
+
+    if self.history is None:
+      raise ValueError('Cannot show trends because the results history is disabled')
+    self.history.trends(targets)
+
+  def collect_records(self) -> list[dict]:
+    records: list[dict] = []
+    for tests in self.tests.values():
+      for test in tests.materialized():
+        records += test.records
+    return records
+
+  def record_history(self) -> None:
+    records = self.collect_records()
+    if len(records) == 0:
+      return
+    for tests in self.tests.values():
+      for test in tests.materialized():
+        test.records = []
+    if self.history is not None:
+      self.history.append(records, self.lartc.fingerprint())
+
+  def write_shard(self, path: str) -> None:
+    records = self.collect_records()
+    with open(path, 'w') as file:
+      json.dump({
+        'shard': self.shard[0],
+        'shards': self.shard[1],
+        'lartc': self.lartc.fingerprint(),
+        'tests': sorted(self.assigned),
+        'records': records,
+      }, file, indent=2)
+
+  def merge_results(self, paths: list[str]) -> list[dict]:
+    if len(paths) == 0:
+      raise ValueError('Cannot merge results: no shard result files were found')
+    shards: dict[int, dict] = {}
+    for path in paths:
+      with open(path) as file:
+        data = json.load(file)
+      if data['shard'] in shards:
+        raise ValueError('Cannot merge results: shard %d/%d appears twice (`%s`)' % (data['shard'], data['shards'], path))
+      shards[data['shard']] = data
+    counts = {data['shards'] for data in shards.values()}
+    if len(counts) != 1:
+      raise ValueError('Cannot merge results: the files come from different shard counts %s' % (sorted(counts),))
+    count = counts.pop()
+
+    records: list[dict] = []
+    tests: dict[str, tuple[int, Outcome, float]] = {}
+    for index, data in sorted(shards.items()):
+      for key in data['tests']:
+        tests[key] = (index, Outcome.PASS, 0.0)
+      for record in data['records']:
+        records.append(record)
+        shard, outcome, duration = tests.get(record['test'], (index, Outcome.PASS, 0.0))
+        if outcome and not Outcome(record['outcome']):
+          outcome = Outcome(record['outcome'])
+        tests[record['test']] = (shard, outcome, duration + record['duration'])
+
+    print('| %s | %s | %s | %s | %s |' % ('KIND'.ljust(6), 'NAME'.ljust(40), 'SHARD'.rjust(5), 'DURATION (s)'.rjust(12), 'OUTCOME'.ljust(7)))
+    for key, (index, outcome, duration) in sorted(tests.items()):
+      kind, name = key.split('/', 1)
+      print('| %s | %s | %s | %s | ' % (TestKind.parse(kind).name.ljust(6), name.ljust(40), ('%d' % (index,)).rjust(5), ('%.3f' % (duration,)).rjust(12)), end='')
+      outcome.color().begin()
+      print(outcome.value.ljust(7), end='')
+      outcome.color().end()
+      print(' |')
+    for index in range(1, count + 1):
+      if index not in shards:
+        print('shard %d/%d: missing' % (index, count))
+      else:
+        print('shard %d/%d: %d tests, %.3f s' % (index, count, len(shards[index]['tests']), sum([duration for (shard, _, duration) in tests.values() if shard == index])))
+    failures = [key for (key, (_, outcome, _)) in tests.items() if not outcome]
+    print('%d tests, %d failed' % (len(tests), len(failures)))
+
+    durations_path = os.path.join(self.test_dir, 'durations.yml')
+    durations: dict[str, float] = (read_yaml(durations_path) or {}) if os.path.exists(durations_path) else {}
+    for key, (_, outcome, duration) in tests.items():
+      if outcome and duration > 0:
+        durations[key] = round(duration, 3)
+    write_yaml(durations_path, dict(sorted(durations.items())))
+    return records
+
+  def cancel(self) -> None:
+    self.cancelled.set()
+    CMD.kill_all()
+
+  def watched_paths(self) -> list[str]:
+    paths = [self.test_dir]
+    for compiler in [self.lartc, self.cc]:
+      paths += [include_directory for include_directory in compiler.include_directories if include_directory not in paths]
+      paths.append(shutil.which(compiler.path) or compiler.path)
+    paths.append('config.yml')
+    return paths
+
+  def invalidate(self, paths: set[str]) -> None:
+    normalize = lambda path: os.path.relpath(os.path.abspath(path))
+    changed = {normalize(path) for path in paths}
+    for compiler in [self.lartc, self.cc]:
+      with compiler.digest_lock:
+        if normalize(shutil.which(compiler.path) or compiler.path) in changed:
+          compiler.digest = None
+        if any([path.startswith(normalize(include_directory) + os.sep) for include_directory in compiler.include_directories for path in changed]):
+          compiler.include_digest = None
+    if normalize(os.path.join(self.test_dir, 'config.yml')) in changed:
+      self.tests = Framework.load_tests(self.test_dir)
+
+  def watch(self, raw_targets: list[str], debounce: float = 0.3):
+    normalize = lambda path: os.path.relpath(os.path.abspath(path))
+    ignored = re.compile(r'\.\d+(\.\d+)?$')
+    harness = {normalize(os.path.join(self.test_dir, name)) for name in ['includes.yml', '.config.pickle', 'bench.yml', 'history.db', 'history.db-journal']}
+    watcher = Watcher.create(self.watched_paths(), debounce)
+    print('Watching %s with %s, press Ctrl-C to stop' % (', '.join(watcher.paths), type(watcher).__name__))
+
+    pending: set[str] = set()
+    worker: threading.Thread|None = None
+    try:
+      while True:
+        artifacts = {normalize(artifact) for tests in self.tests.values() for test in tests.materialized() for artifact in test.artifacts(self)}
+        changed = {path for path in watcher.wait(1.0) if normalize(path) not in artifacts and normalize(path) not in harness and not ignored.search(path)}
+        if len(changed) > 0:
+          pending |= changed
+          if worker is not None and worker.is_alive():
+            self.cancel()
+            worker.join()
+            with CONSOLE_LOCK:
+              print('%s: cancelled the run in progress' % (time.strftime('%H:%M:%S'),))
+        if worker is not None and not worker.is_alive():
+          worker = None
+          self.record_history()
+          self.includes.save()
+        if len(pending) > 0 and worker is None:
+          if 'config.yml' in {normalize(path) for path in pending}:
+            print('config.yml changed, restart the watch to apply it')
+          self.invalidate(pending)
+          self.selection = self.affected(list(pending))
+          with CONSOLE_LOCK:
+            print('%s: %d tests affected by %d changed files' % (time.strftime('%H:%M:%S'), len(self.selection), len(pending)))
+          pending = set()
+          self.cancelled.clear()
+          worker = threading.Thread(target=self.report, args=(raw_targets,), daemon=True)
+          worker.start()
+    except KeyboardInterrupt:
+      if worker is not None:
+        self.cancel()
+        worker.join()
+    finally:
+      watcher.close()
+      self.selection = None
+
+  def write_profile(self, path: str) -> None:
+    with open(path, 'w') as file:
+      json.dump({
+        'timestamp': time.time(),
+        'repeat': self.profile_repeat,
+        'cc': self.cc.fingerprint(),
+        'lartc': self.lartc.fingerprint(),
+        **self.profile.to_dict(),
+      }, file, indent=2)
+
+def reduce_evaluate(job: tuple[dict, dict, dict[str, str], float|None, tuple[str, str|None]|None]) -> str:
+  framework_data, test_data, files, slower, helpers = job
+  if helpers is not None:
+    CMD.helpers = lambda oom: helpers
+  directory = tempfile.mkdtemp(prefix='lart-reduce-')
+  try:
+    for file in test_data['inputs'] + test_data['args'] + [test_data['reference']] + test_data['sources']:
+      if os.path.isfile(os.path.join(test_data['path'], file)):
+        shutil.copy(os.path.join(test_data['path'], file), os.path.join(directory, file))
+    for source, content in files.items():
+      with open(os.path.join(directory, source), 'w') as file:
+        file.write(content)
+    framework = Framework.from_dict(framework_data)
+    framework.cache = BuildCache(os.path.join(directory, '.cache'), 0)
+    framework.includes = IncludeGraph(os.path.join(directory, 'includes.yml'), framework.lartc.include_directories, {})
+    test = Test.from_dict({**test_data, 'path': directory})
+    with contextlib.redirect_stdout(io.StringIO()):
+      if slower is not None:
+        build = framework.limits_for(test, 'build')
+        limits = Limits(3 * slower, build.cpu, build.memory)
+        sources = [os.path.join(directory, source) for source in files.keys() if source.endswith('.lart')]
+        slow = False
+        for source in sources:
+          result = framework.lartc.compile([source], [], source + '.o', False, source + '.com', limits)
+          slow |= result.expired or result.wall > slower
+        return 'SLOW' if slow else 'FAST'
+      return framework.signature(test)
+  finally:
+    shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+  argument_parser = argparse.ArgumentParser()
+  argument_parser.add_argument('-a', '--action', type=str, nargs='*', help='Actions: detect, clean, build, run, consolidate, compare, report, bench, perf, size, memprofile, ir, reduce, history, watch, merge-results')
+  argument_parser.add_argument('-t', '--target', type=str, nargs='*', help='Targets: `<kind>/<name>`')
+  argument_parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Verbose/debug log')
+  argument_parser.add_argument('-j', '--jobs', type=int, default=None, help='Number of tests processed concurrently, or of candidates evaluated concurrently by reduce (0 = one per CPU, default 1 and one per CPU for reduce)')
+  argument_parser.add_argument('--no-fused', action='store_true', default=False, help='Report: write the whole program output before comparing it, instead of streaming it against the reference')
+  argument_parser.add_argument('--repeat', type=int, default=10, help='Bench: measured runs per program')
+  argument_parser.add_argument('--warmup', type=int, default=2, help='Bench: discarded runs per program before measuring')
+  argument_parser.add_argument('--update-baseline', action='store_true', default=False, help='Bench: overwrite the stored baselines with the new measurements')
+  argument_parser.add_argument('--profile', type=int, nargs='?', const=1, default=0, help='Bypass the build cache, compile every source N times (default 1) and print where compile time goes')
+  argument_parser.add_argument('--profile-output', type=str, default=None, help='Write the compile profile as JSON to this path')
+  argument_parser.add_argument('--no-history', action='store_true', default=False, help='Neither record results in tests/history.db nor use it to order tests')
+  argument_parser.add_argument('--changed', type=str, nargs='*', default=None, help='Only act on the tests affected by these changed files')
+  argument_parser.add_argument('--since', type=str, default=None, help='Only act on the tests affected by the files changed since this git revision')
+  argument_parser.add_argument('--debounce', type=float, default=0.3, help='Watch: seconds without file events before a burst of changes is acted upon')
+  argument_parser.add_argument('--shard', type=str, default=None, help='Only act on the i-th of N duration-balanced shards of the targets, as `i/N`')
+  argument_parser.add_argument('--shard-output', type=str, default=None, help='Shard: result file to write (default shard-<i>-of-<N>.json)')
+  argument_parser.add_argument('--shard-results', type=str, nargs='*', default=None, help='Merge-results: shard result files to merge (default shard-*-of-*.json)')
+  argument_parser.add_argument('--json', type=str, default=None, help='Write the results of every test phase as JSON to this path')
+  argument_parser.add_argument('--junit', type=str, default=None, help='Write the results as JUnit XML to this path')
+  argument_parser.add_argument('--build-dir', type=str, default=None, help='Write objects, programs and outputs under this directory (e.g. /dev/shm/lart) instead of into the test directories')
+  argument_parser.add_argument('--max-exponent', type=float, default=1.3, help='Perf: mark a test SLOW when its compile time grows faster than size^N')
+  argument_parser.add_argument('--compare-compiler', type=str, default=None, help='Build, run and benchmark every DIFF test with both lartc and the compiler described in this YAML file, and report the deltas')
+  argument_parser.add_argument('--size-threshold', type=float, default=0.01, help='Size: relative growth of a section that fails a sentinel test')
+  argument_parser.add_argument('--reduce-slower', type=float, default=None, help='Reduce: keep the inputs that take lartc more than this many seconds, instead of those that fail the same way')
+  args = argument_parser.parse_args(sys.argv[1:])
+
+  actions = (args.action or [])
+  do_detect = ('detect' in actions)
+  do_clean = ('clean' in actions)
+  do_build = ('build' in actions)
+  do_run = ('run' in actions)
+  do_consolidate = ('consolidate' in actions)
+  do_compare = ('compare' in actions)
+  do_report = ('report' in actions)
+  do_bench = ('bench' in actions)
+  do_history = ('history' in actions)
+  do_watch = ('watch' in actions)
+  do_merge_results = ('merge-results' in actions)
+  do_perf = ('perf' in actions)
+  do_size = ('size' in actions)
+  do_memprofile = ('memprofile' in actions)
+  do_ir = ('ir' in actions)
+  do_reduce = ('reduce' in actions)
+
+  framework = Framework.load_from_config('config.yml')
+  framework.verbose = (args.verbose or False)
+  framework.fused = not args.no_fused
+  framework.repeat = args.repeat
+  framework.warmup = args.warmup
+  framework.update_baseline = args.update_baseline
+  framework.max_exponent = args.max_exponent
+  framework.size_threshold = args.size_threshold
+  framework.profile_repeat = args.profile
+  jobs = ((os.cpu_count() or 1) if args.jobs == 0 else args.jobs)
+  framework.jobs = (jobs or 1)
+  framework.reduce_jobs = (jobs or os.cpu_count() or 1)
+  framework.build_dir = args.build_dir
+  framework.restore()
+  CMD.helpers = framework.launcher
+  if not args.no_history:
+    framework.history = History(os.path.join(framework.test_dir, 'history.db'))
+
+  if args.changed is not None or args.since is not None:
+    changed = list(args.changed or [])
+    if args.since is not None:
+      changed += framework.changed_since(args.since)
+    framework.selection = framework.affected(changed)
+    print('%d tests affected by %d changed files' % (len(framework.selection), len(changed)))
+
+  if args.shard is not None:
+    match = re.fullmatch(r'(\d+)/(\d+)', args.shard)
+    if match is None or not 1 <= int(match.group(1)) <= int(match.group(2)):
+      raise ValueError('Invalid shard supplied: `%s` is not in format <i>/<N> with 1 <= i <= N' % (args.shard,))
+    framework.shard = (int(match.group(1)), int(match.group(2)))
+
+  targets = (args.target or [])
+  records: list[dict] = []
+  try:
+    if do_detect:
+      framework.detect(targets)
+    if do_clean:
+      framework.clean(targets)
+    if do_build:
+      framework.build(targets)
+    if do_run:
+      framework.run(targets)
+    if do_consolidate:
+      framework.consolidate(targets)
+    if do_compare:
+      framework.compare(targets)
+    if do_report:
+      framework.report(targets)
+    if do_bench:
+      framework.bench(targets)
+    if do_perf:
+      framework.perf(targets)
+    if do_size:
+      framework.size(targets)
+    if do_memprofile:
+      framework.memprofile(targets)
+    if do_ir:
+      framework.ir_report(targets)
+    if do_reduce:
+      framework.reduce(targets, args.reduce_slower)
+    if args.compare_compiler is not None:
+      framework.compare_compiler(targets, args.compare_compiler)
+    if do_watch:
+      framework.watch(targets, args.debounce)
+  finally:
+    if framework.shard is not None:
+      framework.write_shard(args.shard_output or 'shard-%d-of-%d.json' % framework.shard)
+    records += framework.collect_records()
+    framework.record_history()
+  if do_merge_results:
+    records += framework.merge_results(args.shard_results if args.shard_results is not None else sorted(glob.glob('shard-*-of-*.json')))
+  results = Results(records)
+  if args.json is not None:
+    results.write_json(args.json)
+  if args.junit is not None:
+    results.write_junit(args.junit)
+  if do_history:
+    framework.history_trends(targets)
+
+  if framework.profile_repeat > 0:
+    framework.profile.summary()
+  if args.profile_output is not None:
+    framework.write_profile(args.profile_output)
+
+  framework.save()
+  framework.cache.evict()
+  failures = results.failures()
+  if len(failures) > 0:
+    print('%d of %d tests failed: %s' % (len(failures), len(results.tests), ', '.join(failures)))
+    sys.exit(1)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import argparse
+import cProfile
+import contextlib
+import json
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+import harness
+
+STUB = '''#!/bin/sh
+out=
+prev=
+for arg in "$@"; do
+  if [ "$prev" = -o ]; then
+    out=$arg
+  fi
+  prev=$arg
+done
+case "$*" in
+  */fail/*) echo "error: stub failure" >&2; exit 1 ;;
+esac
+case "$out" in
+  *.exe) printf '#!/bin/sh\\ncat "$(dirname "$0")/program.ref" 2>/dev/null\\nexit 0\\n' > "$out"; chmod +x "$out" ;;
+  *) : > "$out" ;;
+esac
+'''
+
+PHASES = ['discover_tests', 'write_tests', 'read_tests (manifest)', 'read_tests (yaml)', 'restore', 'get_targets', 'build (cold)', 'build (warm)', 'run', 'save (dirty)', 'save (clean)', 'record_history']
+
+def generate(root: str, count: int, limits: bool) -> None:
+  os.makedirs(os.path.join(root, 'include'))
+  with open(os.path.join(root, 'include', 'stdlib.lart'), 'w') as file:
+    file.write('typedef i32 = integer<32, true>;\nfn printf(fmt: &i32, ...) -> i32;\n')
+  stub = os.path.join(root, 'stub')
+  with open(stub, 'w') as file:
+    file.write(STUB)
+  os.chmod(stub, 0o755)
+  config = {
+    'cc': {'path': (shutil.which('cc') or stub) if limits else stub, 'include_directories': [], 'options': ['-c']},
+    'lartc': {'path': stub, 'include_directories': ['include'], 'options': []},
+    'test_dir': 'tests',
+    'cache': {'path': '.lart-cache', 'capacity': 1 << 34},
+  }
+  if limits:
+    config['limits'] = {'build': {'cpu': 60, 'memory': 1 << 32}, 'run': {'cpu': 10, 'memory': 1 << 30}}
+  harness.write_yaml(os.path.join(root, 'config.yml'), config)
+  for index in range(count):
+    kind = ['diff', 'diff', 'diff', 'succ', 'succ', 'diff', 'succ', 'diff', 'diff', 'fail'][index % 10]
+    path = os.path.join(root, 'tests', kind, 'test-%05d' % (index,))
+    os.makedirs(path)
+    with open(os.path.join(path, 'source.lart'), 'w') as file:
+      file.write('include "stdlib";\n\nfn main() -> i32 {\n  printf("%%d\\n", %d);\n  return 0;\n}\n' % (index,))
+    if kind == 'diff':
+      with open(os.path.join(path, 'program.ref'), 'w') as file:
+        file.write('%d\n' % (index,))
+
+def measure(samples: dict[str, dict], phase: str, action: Callable[[], object], memory: bool) -> object:
+  if memory:
+    tracemalloc.reset_peak()
+  start = time.perf_counter()
+  result = action()
+  samples[phase] = {'wall': time.perf_counter() - start}
+  if memory:
+    samples[phase]['peak'] = tracemalloc.get_traced_memory()[1]
+  return result
+
+def run(count: int, jobs: int, memory: bool, build: bool, limits: bool) -> dict[str, dict]:
+  samples: dict[str, dict] = {}
+  root = tempfile.mkdtemp(prefix='lart-selfbench-')
+  cwd = os.getcwd()
+  try:
+    generate(root, count, limits)
+    os.chdir(root)
+    test_config = os.path.join('tests', 'config.yml')
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+      tests = measure(samples, 'discover_tests', lambda: harness.Framework.discover_tests('tests'), memory)
+      measure(samples, 'write_tests', lambda: harness.Framework.write_tests(tests, test_config), memory)
+      measure(samples, 'read_tests (manifest)', lambda: harness.Framework.read_tests(test_config), memory)
+      os.remove(harness.Framework.manifest_path(test_config))
+      measure(samples, 'read_tests (yaml)', lambda: harness.Framework.read_tests(test_config), memory)
+      framework = harness.Framework.load_from_config('config.yml')
+      framework.jobs = jobs
+      harness.CMD.helpers = framework.launcher
+      if limits and build:
+        framework.launcher(True)
+      measure(samples, 'restore', framework.restore, memory)
+      names = ['%s/%s' % (kind.value, name) for (kind, table) in framework.tests.items() for name in table]
+      measure(samples, 'get_targets', lambda: framework.get_targets(names), memory)
+      if build:
+        measure(samples, 'build (cold)', lambda: framework.build([]), memory)
+        measure(samples, 'build (warm)', lambda: framework.build([]), memory)
+        measure(samples, 'run', lambda: framework.run([]), memory)
+      framework.dirty = True
+      measure(samples, 'save (dirty)', framework.save, memory)
+      measure(samples, 'save (clean)', framework.save, memory)
+      framework.history = harness.History(os.path.join('tests', 'history.db'))
+      measure(samples, 'record_history', framework.record_history, memory)
+  finally:
+    harness.CMD.helpers = None
+    os.chdir(cwd)
+    shutil.rmtree(root, ignore_errors=True)
+  return samples
+
+def selfbench():
+  argument_parser = argparse.ArgumentParser()
+  argument_parser.add_argument('--sizes', type=int, nargs='*', default=[2500, 5000, 10000], help='Numbers of synthetic tests to measure the harness with')
+  argument_parser.add_argument('-j', '--jobs', type=int, default=0, help='Number of tests built concurrently (0 = one per CPU)')
+  argument_parser.add_argument('--no-build', action='store_true', default=False, help='Skip the build and run phases, which spawn the stub compiler for every source')
+  argument_parser.add_argument('--limits', action='store_true', default=False, help='Configure cpu and memory limits, so that the build and run phases spawn every command through the process launcher')
+  argument_parser.add_argument('--cprofile', type=str, nargs='?', const='', default=None, help='Profile an extra unmeasured pass at the largest size with cProfile, print the hottest functions and optionally dump the stats to this path')
+  argument_parser.add_argument('--tracemalloc', action='store_true', default=False, help='Also record the peak Python heap of every phase')
+  argument_parser.add_argument('--max-exponent', type=float, default=1.3, help='Flag phases whose time grows faster than N^x with the number of tests')
+  argument_parser.add_argument('--output', type=str, default='selfbench.jsonl', help='Append the measurements to this JSON lines file and compare with its last entry')
+  args = argument_parser.parse_args(sys.argv[1:])
+
+  jobs = (args.jobs if args.jobs > 0 else (os.cpu_count() or 1))
+  sizes = sorted(args.sizes)
+  if args.tracemalloc:
+    tracemalloc.start()
+  results: dict[int, dict[str, dict]] = {}
+  for size in sizes:
+    results[size] = run(size, jobs, args.tracemalloc, not args.no_build, args.limits)
+  if args.cprofile is not None:
+    profiler = cProfile.Profile()
+    profiler.runcall(run, sizes[-1], jobs, False, not args.no_build, args.limits)
+    statistics = pstats.Stats(profiler)
+    statistics.sort_stats('cumulative').print_stats(25)
+    if args.cprofile != '':
+      statistics.dump_stats(args.cprofile)
+
+  previous = None
+  if os.path.exists(args.output):
+    with open(args.output) as file:
+      lines = [line for line in file if line.strip() != '']
+    entries = [json.loads(line) for line in lines]
+    entries = [entry for entry in entries if entry.get('limits', False) == args.limits]
+    previous = entries[-1] if len(entries) > 0 else None
+
+  superlinear: list[str] = []
+  phases = [phase for phase in PHASES if phase in results[sizes[-1]]]
+  print('| %s | %s | %s | %s | %s |' % ('PHASE'.ljust(22), ' | '.join([('N=%d (ms)' % (size,)).rjust(12) for size in sizes]), 'us/test'.rjust(8), 'EXPONENT'.rjust(8), 'VS LAST'.rjust(8)))
+  for phase in phases:
+    walls = [results[size][phase]['wall'] for size in sizes]
+    exponent = harness.growth_exponent(sizes, walls)
+    if len(sizes) > 1 and exponent > args.max_exponent:
+      superlinear.append(phase)
+    delta = ''
+    if previous is not None and str(sizes[-1]) in previous['results'] and phase in previous['results'][str(sizes[-1])]:
+      before = previous['results'][str(sizes[-1])][phase]['wall']
+      delta = '%+.1f%%' % (100 * (walls[-1] / max(before, 1e-9) - 1),)
+    print('| %s | %s | %s | %s | %s |' % (
+      phase.ljust(22),
+      ' | '.join([('%.1f' % (1000 * wall,)).rjust(12) for wall in walls]),
+      ('%.1f' % (1e6 * walls[-1] / sizes[-1],)).rjust(8),
+      ('%.2f' % (exponent,)).rjust(8),
+      delta.rjust(8),
+    ))
+    if args.tracemalloc:
+      print('| %s | %s |' % ('  peak heap (KiB)'.ljust(22), ' | '.join([('%d' % (results[size][phase]['peak'] / 1024,)).rjust(12) for size in sizes])))
+  if 'build (cold)' in phases:
+    cold = results[sizes[-1]]['build (cold)']['wall']
+    warm = results[sizes[-1]]['build (warm)']['wall']
+    print('harness overhead of a fully cached build: %.1f%% of a cold build with stub compilers' % (100 * warm / max(cold, 1e-9),))
+
+  with open(args.output, 'a') as file:
+    file.write(json.dumps({'timestamp': time.time(), 'jobs': jobs, 'limits': args.limits, 'results': {str(size): samples for (size, samples) in results.items()}}) + '\n')
+  if len(superlinear) > 0:
+    print('phases growing faster than N^%.2f: %s' % (args.max_exponent, ', '.join(superlinear)))
+    sys.exit(1)
+
+if __name__ == '__main__':
+  selfbench()